@@ -1,6 +1,7 @@
 import requests
 import unittest
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 class WordleRoomsAPITester:
     def __init__(self, base_url):
@@ -8,6 +9,7 @@ class WordleRoomsAPITester:
         self.tests_run = 0
         self.tests_passed = 0
         self.current_room_id = None
+        self.current_game_id = None
         self.username = f"test_user_{datetime.now().strftime('%H%M%S')}"
 
     def run_test(self, name, method, endpoint, expected_status, data=None):
@@ -122,19 +124,153 @@ class WordleRoomsAPITester:
         )
         return success
 
-    def test_get_random_word(self):
-        """Test getting a random word from room"""
+    def test_concurrent_add_word(self, workers=20):
+        """Test that concurrent adds of the same word only succeed once"""
         if not self.current_room_id:
-            print("❌ No room ID available for getting word")
+            print("❌ No room ID available for adding word")
+            return False
+            
+        self.tests_run += 1
+        print(f"\n🔍 Testing Concurrent Add Word ({workers} requests)...")
+        
+        word = "RACING"
+        word_data = {
+            "add_data": {
+                "roomId": self.current_room_id,
+                "word": word
+            },
+            "user": {"username": self.username}
+        }
+        
+        def add(_):
+            return requests.post(f"{self.base_url}/api/rooms/words", json=word_data).status_code
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            statuses = list(executor.map(add, range(workers)))
+        
+        if statuses.count(200) == 1 and statuses.count(400) == workers - 1:
+            self.tests_passed += 1
+            print(f"✅ Passed - exactly one request added '{word}'")
+            return True
+        
+        print(f"❌ Failed - Status codes: {statuses}")
+        return False
+
+    def test_concurrent_join_room(self, workers=20):
+        """Test that concurrent joins by the same user add them only once"""
+        if not self.current_room_id:
+            print("❌ No room ID available for joining")
+            return False
+            
+        self.tests_run += 1
+        print(f"\n🔍 Testing Concurrent Join Room ({workers} requests)...")
+        
+        username = f"race_user_{datetime.now().strftime('%H%M%S')}"
+        join_data = {
+            "join_data": {
+                "roomId": self.current_room_id,
+                "password": None
+            },
+            "user": {"username": username}
+        }
+        
+        def join(_):
+            return requests.post(f"{self.base_url}/api/rooms/join", json=join_data).json()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(join, range(workers)))
+        
+        room = requests.get(f"{self.base_url}/api/rooms/{self.current_room_id}").json()
+        joined = [r for r in responses if r.get("success") and "message" not in r]
+        
+        if len(joined) == 1 and room.get("members", []).count(username) == 1:
+            self.tests_passed += 1
+            print(f"✅ Passed - '{username}' joined exactly once")
+            return True
+        
+        print(f"❌ Failed - {len(joined)} fresh joins, members: {room.get('members')}")
+        return False
+
+    def test_start_game(self):
+        """Test starting a game session with a room word"""
+        if not self.current_room_id:
+            print("❌ No room ID available for starting a game")
+            return False
+            
+        success, response = self.run_test(
+            "Start Game",
+            "POST",
+            "games",
+            200,
+            {"username": self.username, "roomId": self.current_room_id}
+        )
+        if success and 'gameId' in response and 'word' not in response:
+            self.current_game_id = response['gameId']
+            return True
+        return False
+
+    def test_submit_guess(self):
+        """Test submitting the room word as a guess"""
+        if not self.current_game_id:
+            print("❌ No game ID available for guessing")
             return False
             
         success, response = self.run_test(
-            "Get Random Word",
+            "Submit Guess",
+            "POST",
+            f"games/{self.current_game_id}/guess",
+            200,
+            {"username": self.username, "guess": "TESTING"}
+        )
+        return success and response.get('status') == 'won' and response.get('feedback') == ['correct'] * 7
+
+    def test_import_export_words(self):
+        """Test bulk importing words and streaming them back out"""
+        if not self.current_room_id:
+            print("❌ No room ID available for importing words")
+            return False
+            
+        self.tests_run += 1
+        print("\n🔍 Testing Import/Export Words...")
+        
+        words = ["CRANE", "SLATE", "SLATE", "XQZVW", "TESTING"]
+        response = requests.post(
+            f"{self.base_url}/api/rooms/{self.current_room_id}/words/import",
+            params={"username": self.username},
+            data="\n".join(words).encode()
+        )
+        if response.status_code != 200:
+            print(f"❌ Failed - Expected 200, got {response.status_code}")
+            print(f"Response: {response.text}")
+            return False
+        
+        statuses = [result["status"] for result in response.json()["results"]]
+        expected = ["added", "added", "duplicate", "not_in_dictionary", "exists"]
+        exported = requests.get(
+            f"{self.base_url}/api/rooms/{self.current_room_id}/words/export",
+            params={"username": self.username}
+        ).text.split()
+        if statuses == expected and {"CRANE", "SLATE", "TESTING"} <= set(exported):
+            self.tests_passed += 1
+            print(f"✅ Passed - imported {statuses.count('added')} words, exported {len(exported)}")
+            return True
+        
+        print(f"❌ Failed - Statuses: {statuses}, exported: {exported}")
+        return False
+
+    def test_get_room_messages(self):
+        """Test paging room chat history"""
+        if not self.current_room_id:
+            print("❌ No room ID available for getting messages")
+            return False
+            
+        success, response = self.run_test(
+            "Get Room Messages",
             "GET",
-            f"rooms/{self.current_room_id}/words",
+            f"rooms/{self.current_room_id}/messages?limit=10",
             200
         )
-        return success and 'word' in response
+        return success and 'messages' in response and 'nextBefore' in response
 
     def test_leave_room(self):
         """Test leaving a room"""
@@ -183,8 +319,25 @@ def main():
         print("❌ Adding word failed, stopping tests")
         return 1
 
-    if not tester.test_get_random_word():
-        print("❌ Getting random word failed, stopping tests")
+    if not tester.test_start_game():
+        print("❌ Starting game failed, stopping tests")
+        return 1
+
+    if not tester.test_submit_guess():
+        print("❌ Submitting guess failed, stopping tests")
+        return 1
+
+    if not tester.test_concurrent_add_word():
+        print("❌ Concurrent word add race detected")
+
+    if not tester.test_concurrent_join_room():
+        print("❌ Concurrent join race detected")
+
+    if not tester.test_import_export_words():
+        print("❌ Bulk word import/export failed")
+
+    if not tester.test_get_room_messages():
+        print("❌ Getting room messages failed, stopping tests")
         return 1
 
     if not tester.test_leave_room():
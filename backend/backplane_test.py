@@ -0,0 +1,240 @@
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import sys
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from load_test import ASGIClient
+
+# Cross-worker broadcast check: one player per worker, all in one room, and
+# every join notice and chat message has to reach every player.
+#
+# By default the workers are copies of the app loaded side by side in this
+# process, each with its own ConnectionManager as separate workers would have,
+# sharing one in-memory database and a stand-in broadcasts collection that
+# fans every insert out to its change streams (mongomock has no change
+# streams). MongoChangeStreamBackplane runs unchanged on top of it.
+#
+#   python backplane_test.py
+#   python backplane_test.py --workers 3
+#
+# --mongo-url runs the same copies against a real MongoDB instead, with real
+# change streams, so it has to be a replica set (a single-node one will do:
+# mongod --replSet rs0, then rs.initiate() in mongosh):
+#
+#   python backplane_test.py --mongo-url "mongodb://localhost:27017/?replicaSet=rs0"
+#
+# --servers checks separate worker processes instead, over real HTTP and
+# WebSockets (needs the websockets package). Start each one on its own port so
+# every player is pinned to a known process:
+#
+#   export MONGO_URL="mongodb://localhost:27017/?replicaSet=rs0" DB_NAME=backplane BROADCAST_BACKPLANE=mongo
+#   uvicorn server:app --port 8101 &
+#   uvicorn server:app --port 8102 &
+#   python backplane_test.py --servers http://localhost:8101 http://localhost:8102
+
+
+class ChangeStreamCollection:
+    def __init__(self):
+        self.documents = []
+        self.streams = []
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def insert_many(self, documents, ordered=True):
+        for document in documents:
+            self.documents.append(document)
+            for stream in self.streams:
+                stream.push(document)
+
+    def watch(self, pipeline, resume_after=None):
+        return ChangeStream(self, pipeline)
+
+
+class ChangeStream:
+    def __init__(self, collection: ChangeStreamCollection, pipeline):
+        self.collection = collection
+        # Only the stage MongoChangeStreamBackplane uses: skip our own inserts
+        self.skip_origin = pipeline[0]["$match"]["fullDocument.origin"]["$ne"]
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.resume_token = None
+
+    def push(self, document):
+        if document["origin"] != self.skip_origin:
+            self.queue.put_nowait({"operationType": "insert", "fullDocument": document})
+
+    async def __aenter__(self):
+        self.collection.streams.append(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.collection.streams.remove(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        change = await self.queue.get()
+        self.resume_token = {"_data": len(self.collection.documents)}
+        return change
+
+
+class ServerClient:
+    # ASGIClient's interface over the network, for worker processes
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    async def request(self, method: str, path: str, body=None):
+        def call():
+            request = urllib.request.Request(
+                self.url + path,
+                data=json.dumps(body).encode() if body is not None else None,
+                headers={"Content-Type": "application/json"},
+                method=method
+            )
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read() or b"null")
+        return await asyncio.to_thread(call)
+
+    def websocket(self, path: str, params: Optional[Dict] = None) -> "ServerWebSocket":
+        return ServerWebSocket(self.url.replace("http", "ws", 1) + path + "?" + urlencode(params or {}))
+
+
+class ServerWebSocket:
+    def __init__(self, url: str):
+        self.url = url
+        self.connection = None
+
+    async def __aenter__(self):
+        import websockets
+        self.connection = await websockets.connect(self.url)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.connection.close()
+
+    async def send(self, text: str):
+        await self.connection.send(text)
+
+    async def receive(self) -> Optional[str]:
+        import websockets
+        try:
+            return await self.connection.recv()
+        except websockets.ConnectionClosed:
+            return None
+
+
+def load_worker(index: int, db=None, broadcasts: Optional[ChangeStreamCollection] = None):
+    # A fresh copy of the server module, i.e. a worker's own process state
+    spec = importlib.util.spec_from_file_location(f"server_worker_{index}", Path(__file__).with_name("server.py"))
+    worker = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(worker)
+    if db is not None:
+        worker.db = db
+    if broadcasts is not None:
+        worker.manager.backplane = worker.MongoChangeStreamBackplane(broadcasts)
+        worker.manager.backplane.bind(worker.manager.deliver)
+    return worker
+
+
+async def expect(ws, contents, label: str, timeout: float = 5.0) -> bool:
+    # Reads until every expected message has arrived, in any order: broadcasts
+    # from other workers can overtake local ones. Others (e.g. the join
+    # notices of players who connected earlier) are skipped
+    missing = set(contents)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while missing:
+        try:
+            text = await asyncio.wait_for(ws.receive(), deadline - loop.time())
+        except asyncio.TimeoutError:
+            break
+        if text is None:
+            break
+        missing.discard(json.loads(text).get("content"))
+    print(f"{'❌' if missing else '✅'} {label}" + (f": missing {sorted(missing)}" if missing else ""))
+    return not missing
+
+
+async def check(clients) -> bool:
+    host = f"host_{uuid.uuid4().hex[:8]}"
+    await clients[0].request("POST", "/api/users/login", {"username": host})
+    status, room = await clients[0].request("POST", "/api/rooms", {"room_data": {"name": "Backplane"}, "user": {"username": host}})
+    room_id = room["roomId"]
+
+    # One player per worker, all in the same room
+    sockets = []
+    for i, client in enumerate(clients):
+        ws = client.websocket(f"/api/ws/{room_id}", {"username": f"player_{i}"})
+        await ws.__aenter__()
+        sockets.append(ws)
+    try:
+        ok = True
+        # Each socket sees its own join notice and those of everyone after it
+        for i, ws in enumerate(sockets):
+            joins = [f"player_{j} has joined the room" for j in range(i, len(sockets))]
+            ok &= await expect(ws, joins, f"joins of workers {i}-{len(sockets) - 1} -> worker {i}")
+
+        for i, sender in enumerate(sockets):
+            content = f"hello from worker {i}"
+            await sender.send(json.dumps({"content": content}))
+            for j, ws in enumerate(sockets):
+                ok &= await expect(ws, [content], f"chat on worker {i} -> worker {j}")
+        return ok
+    finally:
+        for ws in sockets:
+            await ws.__aexit__(None, None, None)
+
+
+async def run_in_process(workers: int, mongo_url: Optional[str]) -> bool:
+    if mongo_url:
+        os.environ.update(MONGO_URL=mongo_url, DB_NAME=f"backplane_test_{uuid.uuid4().hex[:8]}", BROADCAST_BACKPLANE="mongo")
+        apps = [load_worker(i) for i in range(workers)]
+    else:
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        from mongomock_motor import AsyncMongoMockClient
+        db = AsyncMongoMockClient().get_database("backplane_test")
+        broadcasts = ChangeStreamCollection()
+        apps = [load_worker(i, db, broadcasts) for i in range(workers)]
+
+    lifespans = [worker.app.router.lifespan_context(worker.app) for worker in apps]
+    for lifespan in lifespans:
+        await lifespan.__aenter__()
+    try:
+        return await check([ASGIClient(worker.app) for worker in apps])
+    finally:
+        if mongo_url:
+            await apps[0].client.drop_database(os.environ["DB_NAME"])
+        for lifespan in reversed(lifespans):
+            await lifespan.__aexit__(None, None, None)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Check that room broadcasts reach sockets on every worker")
+    parser.add_argument("--workers", type=int, default=2, help="in-process workers to load")
+    parser.add_argument("--mongo-url", help="run the in-process workers against this replica set")
+    parser.add_argument("--servers", nargs="+", metavar="URL", help="check running worker processes instead")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+
+    if args.servers:
+        ok = asyncio.run(check([ServerClient(url) for url in args.servers]))
+    else:
+        ok = asyncio.run(run_in_process(args.workers, args.mongo_url))
+    print("All broadcasts delivered" if ok else "Some broadcasts were not delivered")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
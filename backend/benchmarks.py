@@ -0,0 +1,302 @@
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+import logs
+import ratelimit
+import serialization
+import server
+
+
+def bench_score_guess(iterations=200000, length=5):
+    """Guess evaluation kernel throughput"""
+    rng = random.Random(42)
+    words = [
+        "".join(rng.choice(string.ascii_uppercase) for _ in range(length)).encode()
+        for _ in range(1000)
+    ]
+    pairs = [(rng.choice(words), rng.choice(words)) for _ in range(1000)]
+    score_guess = server.score_guess
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        guess, answer = pairs[i % 1000]
+        score_guess(guess, answer)
+    elapsed = time.perf_counter() - started
+
+    return {"iterations": iterations, "seconds": round(elapsed, 3), "guessesPerSecond": round(iterations / elapsed)}
+
+
+def bench_feedback_lookup(iterations=200000, length=5):
+    """Guess path: dictionary check plus feedback, matrix row reused vs scoring"""
+    word_list = server.word_lists.get(length)
+    rng = random.Random(42)
+    pairs = [(rng.choice(word_list.words).decode(), rng.choice(word_list.answers)) for _ in range(1000)]
+    score_guess = server.score_guess
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        guess, answer = pairs[i % 1000]
+        word_list.feedback_at(word_list.index_of(guess), answer)
+    lookup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        guess, answer = pairs[i % 1000]
+        word_list.index_of(guess)
+        score_guess(guess.encode(), answer.encode())
+    scoring = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "lookupsPerSecond": round(iterations / lookup),
+        "scoredPerSecond": round(iterations / scoring),
+        "speedup": round(scoring / lookup, 2)
+    }
+
+
+def bench_dictionary_lookup(iterations=200000, length=5):
+    """Dictionary membership, half hits and half misses"""
+    word_list = server.word_lists.get(length)
+    rng = random.Random(42)
+    words = [rng.choice(word_list.words).decode() for _ in range(500)]
+    words += ["".join(rng.choice(string.ascii_uppercase) for _ in range(length)) for _ in range(500)]
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        words[i % 1000] in word_list
+    elapsed = time.perf_counter() - started
+
+    return {"iterations": iterations, "seconds": round(elapsed, 3), "microsecondsPerLookup": round(elapsed / iterations * 1e6, 3)}
+
+
+def bench_dictionary_bulk(batch=5000, length=5):
+    """Bulk validation as used by word imports"""
+    word_lists = server.word_lists
+    word_list = word_lists.get(length)
+    rng = random.Random(42)
+    words = [rng.choice(word_list.words).decode() for _ in range(batch // 2)]
+    words += ["".join(rng.choice(string.ascii_uppercase) for _ in range(length)) for _ in range(batch - len(words))]
+
+    started = time.perf_counter()
+    word_lists.validate_many(words)
+    elapsed = time.perf_counter() - started
+
+    return {"batch": batch, "seconds": round(elapsed, 4), "wordsPerSecond": round(batch / elapsed)}
+
+
+def _large_room(words=5000, members=1000, messages=50):
+    rng = random.Random(42)
+    started = datetime(2024, 1, 1)
+    return {
+        "_id": ObjectId(),
+        "id": "room",
+        "name": "Large room",
+        "host": "member_0",
+        "members": [f"member_{i}" for i in range(members)],
+        "words": [
+            {
+                "word": "".join(rng.choice(string.ascii_uppercase) for _ in range(5)),
+                "addedBy": f"member_{rng.randrange(members)}",
+                "timestamp": started + timedelta(seconds=i)
+            }
+            for i in range(words)
+        ],
+        "isPrivate": False,
+        "createdAt": started,
+        "messages": [
+            {"id": str(ObjectId()), "type": "chat", "content": "hello " * 10, "sender": "member_1", "timestamp": started.isoformat()}
+            for _ in range(messages)
+        ],
+    }
+
+
+def bench_room_serialization(iterations=50):
+    """Encoding a large room document: jsonable_encoder + json vs the fast path"""
+    room = _large_room()
+
+    def legacy():
+        # What get_room used to do: convert _id by hand, then FastAPI's encoder
+        converted = {key: str(value) if key == "_id" else value for key, value in room.items()}
+        return json.dumps(jsonable_encoder(converted), ensure_ascii=False, separators=(",", ":")).encode()
+
+    results = {"bytes": len(serialization.dumps(room)), "orjson": serialization.orjson is not None}
+    for name, encode in (("legacy", legacy), ("fast", lambda: serialization.dumps(room))):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            encode()
+        results[f"{name}Ms"] = round((time.perf_counter() - started) / iterations * 1000, 3)
+    results["speedup"] = round(results["legacyMs"] / results["fastMs"], 1)
+    return results
+
+
+def bench_broadcast_encoding(iterations=100000):
+    """Encoding one chat frame: json.dumps vs the fast path"""
+    message = {"type": "chat", "content": "hello there", "sender": "player", "timestamp": datetime.now().isoformat()}
+
+    results = {}
+    for name, encode in (("json", json.dumps), ("fast", serialization.dumps_text)):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            encode(message)
+        results[f"{name}Us"] = round((time.perf_counter() - started) / iterations * 1e6, 3)
+    results["speedup"] = round(results["jsonUs"] / results["fastUs"], 1)
+    return results
+
+
+class _SlowSink:
+    # A log destination that takes write_delay per write, like a pipe to a
+    # busy collector or a contended disk
+    def __init__(self, write_delay: float):
+        self.write_delay = write_delay
+
+    def write(self, text):
+        time.sleep(self.write_delay)
+
+    def flush(self):
+        pass
+
+
+def bench_logging(iterations=5000, write_delay=0.0001):
+    """Caller-side cost of one info log: written inline vs queued, with a slow sink"""
+    results = {}
+    sink = _SlowSink(write_delay)
+    queued = logs.Logging()
+    for name in ("inline", "queued", "sampled"):
+        logger = logging.Logger(f"bench.{name}")
+        if name == "inline":
+            inline = logging.StreamHandler(sink)
+            inline.setFormatter(logs.JSONFormatter())
+            logger.addHandler(inline)
+        else:
+            queued.configure(queue_size=iterations + 1, sample_rate=0.1 if name == "sampled" else 1.0)
+            queued.listener.handlers[0].setStream(sink)
+            logger.addHandler(queued.handler)
+        extra = {"room_id": "room", "sampled": name == "sampled"}
+        started = time.perf_counter()
+        for i in range(iterations):
+            logger.info("User %s joined room %s", i, "room", extra=extra)
+        results[f"{name}Us"] = round((time.perf_counter() - started) / iterations * 1e6, 3)
+        queued.stop()
+    # configure() took over the root logger; hand it back to the server's setup
+    server.log_config.configure(server.LOG_LEVEL, server.LOG_FORMAT, server.LOG_QUEUE_SIZE, server.LOG_SAMPLE_RATE)
+    return results
+
+
+def bench_rate_limiter(iterations=200000):
+    """One token-bucket check, with few and with many tracked keys"""
+    results = {}
+    for keys in (100, 100000):
+        limiter = ratelimit.TokenBucketLimiter(rate=5, burst=10, max_keys=keys)
+        users = [(f"room_{i % 50}", f"player_{i}") for i in range(keys)]
+        started = time.perf_counter()
+        for i in range(iterations):
+            limiter.allow(users[i % keys])
+        results[f"keys{keys}Us"] = round((time.perf_counter() - started) / iterations * 1e6, 3)
+    return results
+
+
+# Run in a fresh interpreter per sample: time `import server` (the ASGI app)
+# and its lifespan startup. The database is the in-memory stand-in, so this
+# measures the app's own startup work, not the network.
+_COLD_START = """
+import asyncio, json, os, time
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+from mongomock_motor import AsyncMongoMockClient
+server.db = AsyncMongoMockClient().get_database("coldstart")
+connected = time.perf_counter()
+
+async def startup():
+    async with server.app.router.lifespan_context(server.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({"importMs": (imported - started) * 1000, "startupMs": (ready - connected) * 1000}))
+"""
+
+
+def _slowest_imports(importtime: str, top: int = 5):
+    # `-X importtime` lines are "import time: self | cumulative | name", with
+    # the name indented by nesting depth and children listed before their
+    # parent; keep what server imports directly
+    children, modules = [], []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        if name.startswith("   ") and not name.startswith("    "):
+            children.append((int(cumulative) / 1000, name.strip()))
+        elif not name.startswith("  "):
+            if name.strip() == "server":
+                modules = children
+            children = []
+    return {name: round(ms, 1) for ms, name in sorted(modules, reverse=True)[:top]}
+
+
+def bench_cold_start(samples=5, budget=float(os.environ.get("COLD_START_BUDGET", 2.0))):
+    """Fresh-process import plus lifespan startup, asserted against a budget in seconds"""
+    runs = []
+    for i in range(samples):
+        # The first run also records the import profile
+        command = [sys.executable, "-X", "importtime", "-c", _COLD_START] if i == 0 else [sys.executable, "-c", _COLD_START]
+        result = subprocess.run(command, cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        if i == 0:
+            slowest = _slowest_imports(result.stderr)
+
+    results = {
+        key: round(statistics.median(run[key] for run in runs[1:] or runs), 1)
+        for key in ("importMs", "startupMs")
+    }
+    results["totalMs"] = round(results["importMs"] + results["startupMs"], 1)
+    results["budgetMs"] = budget * 1000
+    results["slowestImports"] = slowest
+    assert results["totalMs"] <= results["budgetMs"], f"Cold start took {results['totalMs']}ms, budget is {results['budgetMs']}ms"
+    return results
+
+
+BENCHMARKS = {
+    "score_guess": bench_score_guess,
+    "feedback_lookup": bench_feedback_lookup,
+    "dictionary_lookup": bench_dictionary_lookup,
+    "dictionary_bulk": bench_dictionary_bulk,
+    "room_serialization": bench_room_serialization,
+    "broadcast_encoding": bench_broadcast_encoding,
+    "logging": bench_logging,
+    "rate_limiter": bench_rate_limiter,
+    "cold_start": bench_cold_start,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend micro-benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        print(f"{name}: {BENCHMARKS[name]()}")
+
+
+if __name__ == "__main__":
+    main()
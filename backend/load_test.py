@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+# Simulated players driving the app in-process, straight through its ASGI
+# interface (no sockets, no server). By default the database is an in-memory
+# Mongo stand-in (mongomock-motor); pass --mongo-url to run against a real one.
+#
+#   python load_test.py --players 1000 --rooms 50
+#   python load_test.py --players 100 --rooms 10 --save baselines/load_test.json
+#   python load_test.py --players 100 --rooms 10 --compare baselines/load_test.json
+#
+# The harness shares the event loop and CPU with the app, so absolute numbers
+# are a lower bound on what a dedicated server does; compare runs made with
+# the same settings on the same machine. The stand-in scans collections
+# linearly and blocks the loop while it does, so it degrades long before a
+# real MongoDB would; use --mongo-url for capacity numbers.
+
+
+class ASGIClient:
+    def __init__(self, app, address: str = "127.0.0.1"):
+        self.app = app
+        # Client address the app sees (rate limits are per address too)
+        self.address = address
+
+    async def request(self, method: str, path: str, body=None, params: Optional[Dict] = None, content: bytes = None):
+        if content is None:
+            content = json.dumps(body).encode() if body is not None else b""
+        query = urlencode(params or {}).encode()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query,
+            "headers": [(b"host", b"loadtest"), (b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())],
+            "client": (self.address, 0),
+            "server": ("loadtest", 80),
+        }
+        sent = False
+        finished = asyncio.Event()
+        status = 0
+        chunks = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": content, "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        finished.set()
+        raw = b"".join(chunks)
+        try:
+            return status, json.loads(raw) if raw else None
+        except ValueError:
+            return status, raw
+
+    def websocket(self, path: str, params: Optional[Dict] = None) -> "ASGIWebSocket":
+        return ASGIWebSocket(self.app, path, urlencode(params or {}).encode(), self.address)
+
+
+class ASGIWebSocket:
+    def __init__(self, app, path: str, query: bytes, address: str = "127.0.0.1"):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query,
+            "headers": [(b"host", b"loadtest")],
+            "client": (address, 0),
+            "server": ("loadtest", 80),
+            "subprotocols": [],
+        }
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.outgoing: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        await self.incoming.put({"type": "websocket.connect"})
+        self.task = asyncio.create_task(self.app(self.scope, self.incoming.get, self.outgoing.put))
+        message = await self.outgoing.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionError(f"WebSocket rejected: {message}")
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self.task, timeout=5)
+        except (asyncio.TimeoutError, Exception):
+            self.task.cancel()
+
+    async def send(self, text: str):
+        await self.incoming.put({"type": "websocket.receive", "text": text})
+
+    async def receive(self) -> Optional[str]:
+        # None once the server closed the socket
+        message = await self.outgoing.get()
+        if message["type"] == "websocket.send":
+            return message.get("text")
+        return None
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float, ok: bool = True):
+        self.samples.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def call(self, client: ASGIClient, name: str, method: str, path: str, body=None, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            status, data = await client.request(method, path, body, **kwargs)
+        except Exception:
+            self.add(name, time.perf_counter() - started, ok=False)
+            return None
+        self.add(name, time.perf_counter() - started, ok=status in expected)
+        return data if status in expected else None
+
+    def report(self, duration: float) -> Dict[str, Dict]:
+        report = {}
+        for name in sorted(self.samples):
+            samples = sorted(self.samples[name])
+            report[name] = {
+                "count": len(samples),
+                "errors": self.errors.get(name, 0),
+                "throughput": round(len(samples) / duration, 1),
+                "p50Ms": percentile(samples, 50),
+                "p95Ms": percentile(samples, 95),
+                "p99Ms": percentile(samples, 99),
+                "maxMs": round(samples[-1] * 1000, 2),
+            }
+        return report
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    # Nearest-rank on an already sorted list, in milliseconds
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return round(samples[index] * 1000, 2)
+
+
+async def play(client: ASGIClient, recorder: Recorder, args, username: str, room_id: str, words: List[str], rng: random.Random):
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    if await recorder.call(client, "POST /api/users/login", "POST", "/api/users/login", {"username": username}) is None:
+        return
+    await recorder.call(client, "POST /api/rooms/join", "POST", "/api/rooms/join", {
+        "join_data": {"roomId": room_id},
+        "user": {"username": username}
+    })
+
+    pending: Dict[str, float] = {}
+    try:
+        async with client.websocket(f"/api/ws/{room_id}", {"username": username}) as ws:
+            async def listen():
+                # Chat latency is send -> own message broadcast back
+                while True:
+                    text = await ws.receive()
+                    if text is None:
+                        # Closed by the server, e.g. evicted as a slow consumer
+                        recorder.add("WS closed by server", 0, ok=False)
+                        return
+                    message = json.loads(text)
+                    sent_at = pending.pop(message.get("content", ""), None)
+                    if sent_at is not None:
+                        recorder.add("WS chat round trip", time.perf_counter() - sent_at)
+
+            listener = asyncio.create_task(listen())
+            for _ in range(args.games):
+                await play_game(client, recorder, args, username, room_id, words, rng)
+                for _ in range(args.messages):
+                    token = f"{username}:{uuid.uuid4().hex[:8]}"
+                    pending[token] = time.perf_counter()
+                    await ws.send(json.dumps({"content": token}))
+                    await asyncio.sleep(rng.uniform(0, args.think))
+
+            # Give the last echoes a moment, then count the rest as lost
+            for _ in range(50):
+                if not pending:
+                    break
+                await asyncio.sleep(0.1)
+            for sent_at in pending.values():
+                recorder.add("WS chat round trip", time.perf_counter() - sent_at, ok=False)
+            listener.cancel()
+    except ConnectionError:
+        recorder.add("WS connect", 0, ok=False)
+
+
+async def play_game(client: ASGIClient, recorder: Recorder, args, username: str, room_id: str, words: List[str], rng: random.Random):
+    game = await recorder.call(client, "POST /api/games", "POST", "/api/games", {
+        "username": username,
+        "roomId": room_id,
+        "noRepeat": True
+    })
+    if game is None:
+        return
+    for guess in rng.sample(words, min(len(words), game["maxAttempts"])):
+        await asyncio.sleep(rng.uniform(0, args.think))
+        result = await recorder.call(client, "POST /api/games/{id}/guess", "POST", f"/api/games/{game['gameId']}/guess", {
+            "username": username,
+            "guess": guess
+        })
+        if result is None or result["status"] != "playing":
+            break
+    await recorder.call(client, "POST /api/scores", "POST", "/api/scores", {"username": username, "gameId": game["gameId"]})
+
+
+def patch_mongomock():
+    # The stand-in lacks some aggregation operators the app's pipelines use;
+    # teach it those here rather than bending the production queries
+    from mongomock import aggregate
+
+    if "$round" in aggregate.arithmetic_operators:
+        return
+    aggregate.arithmetic_operators.add("$round")
+    handle = aggregate._Parser._handle_arithmetic_operator
+
+    def handle_arithmetic_operator(parser, operator, values):
+        if operator != "$round":
+            return handle(parser, operator, values)
+        # {"$round": [number, places]}, places defaulting to 0
+        number, places = (list(parser.parse_many(values)) + [0])[:2]
+        return None if number is None else round(number, places)
+
+    aggregate._Parser._handle_arithmetic_operator = handle_arithmetic_operator
+
+
+async def run(args) -> Dict:
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+        os.environ["DB_NAME"] = f"loadtest_{uuid.uuid4().hex[:8]}"
+    else:
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    import server
+
+    if not args.mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+        patch_mongomock()
+        server.db = AsyncMongoMockClient().get_database("loadtest")
+
+    client = ASGIClient(server.app)
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    words = sorted(server.word_lists.get(5).answers)
+
+    async with server.app.router.lifespan_context(server.app):
+        # Setup, not measured: one host and a word list per room
+        rooms = []
+        for i in range(args.rooms):
+            host = f"host_{i}"
+            await client.request("POST", "/api/users/login", {"username": host})
+            status, room = await client.request("POST", "/api/rooms", {
+                "room_data": {"name": f"Load test room {i}"},
+                "user": {"username": host}
+            })
+            await client.request("POST", f"/api/rooms/{room['roomId']}/words/import", params={"username": host}, content="\n".join(words).encode())
+            rooms.append(room["roomId"])
+
+        # Every player connects from an address of its own
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            play(ASGIClient(server.app, f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"), recorder, args, f"player_{i}", rooms[i % len(rooms)], words, random.Random(rng.random()))
+            for i in range(args.players)
+        ))
+        duration = time.perf_counter() - started
+
+        if args.mongo_url:
+            await server.client.drop_database(os.environ["DB_NAME"])
+
+    return {
+        "config": {
+            "players": args.players,
+            "rooms": args.rooms,
+            "games": args.games,
+            "messages": args.messages,
+            "store": "mongo" if args.mongo_url else "mongomock",
+        },
+        "durationSeconds": round(duration, 2),
+        "endpoints": recorder.report(duration),
+    }
+
+
+def compare(result: Dict, baseline: Dict) -> List[str]:
+    lines = []
+    for name, stats in result["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            lines.append(f"{name}: new")
+            continue
+        changes = []
+        for key in ("p50Ms", "p95Ms", "p99Ms", "throughput"):
+            if before[key]:
+                changes.append(f"{key} {(stats[key] - before[key]) / before[key] * 100:+.0f}%")
+        lines.append(f"{name}: {', '.join(changes)}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test for the REST and WebSocket API")
+    parser.add_argument("--players", type=int, default=1000, help="concurrent simulated players")
+    parser.add_argument("--rooms", type=int, default=50, help="rooms the players are spread over")
+    parser.add_argument("--games", type=int, default=2, help="games per player")
+    parser.add_argument("--messages", type=int, default=3, help="chat messages per player per game")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which players arrive")
+    parser.add_argument("--think", type=float, default=0.2, help="max pause before each guess and chat message")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", help="real MongoDB to use instead of the in-memory stand-in")
+    parser.add_argument("--save", type=Path, help="write the report as a baseline JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON file to diff against")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2, sort_keys=True)
+    print(output)
+
+    if args.compare:
+        for line in compare(result, json.loads(args.compare.read_text())):
+            print(line)
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
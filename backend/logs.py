@@ -0,0 +1,145 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import traceback
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Logging off the event loop. Handlers on the loop thread only copy each record
+# into a bounded in-memory queue; a listener thread does the formatting and the
+# writes. Records are rendered as one JSON object per line and carry the
+# request id and room id of the request or WebSocket that logged them.
+#
+# Messages use %-style arguments (logger.info("joined %s", room_id)) so the
+# string is only built on the listener thread, and only for records that pass
+# the level and sampling checks. Arguments are kept by reference until then:
+# pass values, not objects that are about to be mutated.
+#
+# High-volume info events are sampled: pass extra={"sampled": True} and only
+# a sample_rate share of them is kept (warnings and errors always are). Kept
+# records carry the rate so counts can be scaled back up.
+
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+room_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("room_id", default=None)
+
+# LogRecord attributes that aren't user supplied extras
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    # Runs on the caller's thread: sample, stamp the context, enqueue. The
+    # stock prepare() formats the message here, which is the work we want off
+    # the event loop, so the record is passed through as is.
+    def __init__(self, log_queue: queue.Queue, sample_rate: float = 1.0):
+        super().__init__(log_queue)
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def emit(self, record: logging.LogRecord):
+        if getattr(record, "sampled", False) and record.levelno <= logging.INFO:
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                self.sampled_out += 1
+                return
+            record.sampled = self.sample_rate
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id.get()
+        if getattr(record, "room_id", None) is None:
+            record.room_id = room_id.get()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block the caller on a slow log sink
+            self.dropped += 1
+
+
+class Logging:
+    def __init__(self):
+        self.handler: Optional[ContextQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        atexit.register(self.stop)
+
+    def configure(self, level: str = "INFO", fmt: str = "json", queue_size: int = 10000, sample_rate: float = 1.0):
+        # Replaces the root handlers; call once at startup
+        self.stop()
+        output = logging.StreamHandler(sys.stderr)
+        if fmt == "json":
+            output.setFormatter(JSONFormatter())
+        else:
+            output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        self.handler = ContextQueueHandler(queue.Queue(queue_size), sample_rate)
+        self.listener = logging.handlers.QueueListener(self.handler.queue, output, respect_handler_level=True)
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level.upper())
+        self.listener.start()
+
+    def stop(self):
+        # Writes out whatever is still queued
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> Dict[str, int]:
+        if self.handler is None:
+            return {"queued": 0, "dropped": 0, "sampledOut": 0}
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "sampledOut": self.handler.sampled_out,
+        }
+
+
+class LogContextMiddleware:
+    # Gives every HTTP request and WebSocket connection a request id (the
+    # caller's X-Request-Id if it sent one), visible to everything it logs and
+    # echoed back in the response headers
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        current = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                current = value.decode("latin-1")[:64]
+                break
+        current = current or uuid.uuid4().hex
+        token = request_id.set(current)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-request-id", current.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id.reset(token)
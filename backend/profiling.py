@@ -0,0 +1,235 @@
+import asyncio
+import hmac
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Opt-in stack-sampling profiler for individual requests. While a profiled
+# request is in flight a background thread looks at it every few milliseconds:
+#   cpu    its code is on the event loop thread's stack
+#   mongo  it is suspended on a thread-pool future, which is how Motor runs
+#          driver calls
+#   wait   it is suspended on anything else (sleeps, locks, queues) or ready
+#          but waiting for the loop
+# Samples are weighted by the time since the previous one (the sampler needs
+# the GIL, so it gets to run less often while the request is burning CPU), and
+# stacks are kept in collapsed form ("a;b;c microseconds"), which
+# flamegraph.pl and speedscope load directly. Finished profiles go into a ring
+# buffer. Nothing is touched for requests that aren't profiled.
+
+CPU = "cpu"
+MONGO = "mongo"
+WAIT = "wait"
+
+
+def _awaits_executor(future) -> bool:
+    # loop.run_in_executor futures carry the callback that chains them to the
+    # concurrent.futures.Future
+    for callback in getattr(future, "_callbacks", None) or ():
+        function = callback[0] if isinstance(callback, tuple) else callback
+        if getattr(function, "__qualname__", "").startswith("_chain_future."):
+            return True
+    return False
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+class RequestProfile:
+    def __init__(self, task: asyncio.Task, root_frame, thread_id: int, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.root_frame = root_frame
+        self.thread_id = thread_id
+        self.method = method
+        self.path = path
+        self.endpoint: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.wall: Optional[float] = None
+        self.last_sample = self.started
+        self.samples = 0
+        self.seconds = {CPU: 0.0, MONGO: 0.0, WAIT: 0.0}
+        self.stacks: Dict[str, int] = {}
+
+    def sample(self, frames: Dict[int, object], now: float):
+        stack = self._running_stack(frames.get(self.thread_id))
+        if stack is not None:
+            category = CPU
+        else:
+            stack = self._suspended_stack()
+            category = MONGO if _awaits_executor(getattr(self.task, "_fut_waiter", None)) else WAIT
+        weight = now - self.last_sample
+        self.last_sample = now
+        self.samples += 1
+        self.seconds[category] += weight
+        key = ";".join([category] + stack)
+        self.stacks[key] = self.stacks.get(key, 0) + round(weight * 1e6)
+
+    def _running_stack(self, frame) -> Optional[List[str]]:
+        # The loop thread's stack, cut at the middleware, if this request is on it
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            if frame is self.root_frame:
+                return [_frame_name(f) for f in reversed(stack)]
+            frame = frame.f_back
+        return None
+
+    def _suspended_stack(self) -> List[str]:
+        # Follow the chain of awaited coroutines down to where it is blocked
+        stack = []
+        inside = False
+        awaitable = self.task.get_coro()
+        while awaitable is not None and hasattr(awaitable, "cr_frame"):
+            frame = awaitable.cr_frame
+            if frame is self.root_frame:
+                inside = True
+            if inside and frame is not None:
+                stack.append(_frame_name(frame))
+            awaitable = awaitable.cr_await
+        return stack
+
+    def finish(self, status: int):
+        self.status = status
+        self.wall = time.perf_counter() - self.started
+        # Don't keep the request's frames (and their locals) alive in the buffer
+        self.task = None
+        self.root_frame = None
+
+    def summary(self) -> Dict:
+        wall = self.wall if self.wall is not None else time.perf_counter() - self.started
+        sampled = sum(self.seconds.values())
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "startedAt": self.started_at.isoformat(),
+            "wallMs": round(wall * 1000, 3),
+            "samples": self.samples,
+            # Wall time split by each state's share of the sampled time; None
+            # when the request finished before the sampler got to look at it
+            # (it needs the GIL, so a short CPU-bound request can beat it)
+            "breakdownMs": {
+                category: round(wall * 1000 * seconds / sampled, 3)
+                for category, seconds in self.seconds.items()
+            } if sampled else None,
+        }
+
+    def to_dict(self) -> Dict:
+        profile = self.summary()
+        profile["stacks"] = [
+            {"stack": stack, "microseconds": weight}
+            for stack, weight in sorted(self.stacks.items(), key=lambda item: -item[1])
+        ]
+        return profile
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {weight}\n" for stack, weight in self.stacks.items())
+
+
+class Profiler:
+    def __init__(self, interval: float, buffer_size: int):
+        self.interval = interval
+        self.active: Dict[str, RequestProfile] = {}
+        self.recent: deque = deque(maxlen=buffer_size)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def begin(self, root_frame, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(asyncio.current_task(), root_frame, threading.get_ident(), method, path)
+        with self.lock:
+            self.active[profile.id] = profile
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+        return profile
+
+    def end(self, profile: RequestProfile, status: int):
+        with self.lock:
+            self.active.pop(profile.id, None)
+            profile.finish(status)
+            self.recent.append(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self.lock:
+            return next((profile for profile in self.recent if profile.id == profile_id), None)
+
+    def list(self) -> List[RequestProfile]:
+        with self.lock:
+            return list(reversed(self.recent))
+
+    def _run(self):
+        while True:
+            # Sleep until something is being profiled, then sample right away
+            # (a request can be over before the first interval is) and every
+            # interval after that
+            self.wakeup.wait()
+            with self.lock:
+                if not self.active:
+                    self.wakeup.clear()
+                    continue
+                frames = sys._current_frames()
+                now = time.perf_counter()
+                for profile in self.active.values():
+                    try:
+                        profile.sample(frames, now)
+                    except Exception:
+                        # The loop thread moved on mid-walk; skip this sample
+                        pass
+                del frames
+            time.sleep(self.interval)
+
+
+class ProfilingMiddleware:
+    # Profiles a random sample_rate share of requests, plus any request whose
+    # trigger header carries the token. The profile id comes back in the
+    # X-Profile-Id response header.
+    def __init__(self, app, profiler: Profiler, sample_rate: float = 0.0,
+                 header: str = "x-profile", token: Optional[str] = None):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode()
+        self.token = token.encode() if token else None
+
+    def should_profile(self, scope) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == self.header:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        profile = self.profiler.begin(sys._getframe(), scope["method"], scope["path"])
+        status = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            endpoint = scope.get("endpoint")
+            profile.endpoint = getattr(endpoint, "__name__", None)
+            self.profiler.end(profile, status)
@@ -0,0 +1,64 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable, List
+
+# In-process token buckets. Every key (a user, a room, a client address or a
+# tuple of them) gets a bucket holding up to `burst` tokens that refills at
+# `rate` tokens per second; each allowed call takes one token. The refill is
+# computed lazily from the time since the key was last seen, so a check is a
+# dict lookup and a little arithmetic, with no timers or background sweeps.
+#
+# Buckets are kept least recently used first and the oldest are dropped past
+# max_keys. A dropped key comes back with a full bucket, which is what it
+# would have refilled to anyway unless it was seen within the last
+# burst / rate seconds.
+#
+# Limits are per process: with several workers a client can get up to
+# workers x rate through. A rate of 0 or less turns the limiter off.
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        # key -> [tokens, last refill (monotonic seconds)]
+        self.buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+        self.stats = {"allowed": 0, "rejected": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def allow(self, key: Hashable, cost: float = 1) -> bool:
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(self.burst), now]
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+
+        if bucket[0] < cost:
+            self.stats["rejected"] += 1
+            return False
+        bucket[0] -= cost
+        self.stats["allowed"] += 1
+        return True
+
+    def retry_after(self, key: Hashable, cost: float = 1) -> int:
+        # Whole seconds until `cost` tokens are available, for Retry-After
+        bucket = self.buckets.get(key)
+        if not self.enabled or bucket is None:
+            return 0
+        tokens = min(self.burst, bucket[0] + (time.monotonic() - bucket[1]) * self.rate)
+        return max(1, math.ceil((cost - tokens) / self.rate)) if tokens < cost else 0
+
+    def clear(self):
+        self.buckets.clear()
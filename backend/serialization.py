@@ -0,0 +1,57 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# One JSON encoder for HTTP responses, WebSocket frames and exports. orjson
+# when it is installed, the standard library otherwise; both produce compact
+# UTF-8 and render the types Mongo documents carry the same way: datetimes as
+# ISO 8601 (what datetime.isoformat() gives) and ObjectIds as hex strings.
+
+
+def default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # orjson's native datetime output matches isoformat(), so no passthrough
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(default=default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(value: Any) -> bytes:
+        return _encoder.encode(value).encode()
+
+    loads = json.loads
+
+
+def dumps_text(value: Any) -> str:
+    # For text WebSocket frames
+    return dumps(value).decode()
+
+
+class FastJSONResponse(JSONResponse):
+    # As the app's default response class this only changes the final encode:
+    # FastAPI still runs jsonable_encoder over whatever a handler returns.
+    # Handlers skip that pass (and can hand over Mongo documents as-is) by
+    # returning a FastJSONResponse themselves.
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,21 +1,43 @@
-from fastapi import FastAPI, HTTPException, Body, Depends, Query, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.requests import HTTPConnection
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-import uvicorn
+from typing import List, Optional, Dict, Any, Callable, Awaitable
 import os
+import sys
 import logging
 from pathlib import Path
 import random
 import uuid
+import asyncio
+import bisect
+import threading
+import time
+import weakref
+import hashlib
+import hmac
+import base64
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-import json
 from bson import ObjectId
 
+try:
+    from . import logs, metrics, profiling, ratelimit, serialization, wordlists
+except ImportError:
+    # Running from inside backend/ (e.g. `uvicorn server:app`)
+    import logs
+    import metrics
+    import profiling
+    import ratelimit
+    import serialization
+    import wordlists
+
 class PyObjectId(ObjectId):
     @classmethod
     def __get_validators__(cls):
@@ -35,12 +57,326 @@ class PyObjectId(ObjectId):
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Logging settings: JSON lines written by a background thread. LOG_SAMPLE_RATE
+# is the share of high-volume info events (joins, leaves, word changes) kept.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))
+
+log_config = logs.Logging()
+log_config.configure(LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_RATE)
+logger = logging.getLogger(__name__)
+
+# Metrics, served on /api/metrics in Prometheus text format
+registry = metrics.Registry()
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"])
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served")
+mongo_command_seconds = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command round trip time", ["collection", "command"])
+mongo_command_failures = registry.counter(
+    "mongo_command_failures_total", "MongoDB commands that returned an error", ["collection", "command"])
+broadcast_fanout_seconds = registry.histogram(
+    "broadcast_fanout_duration_seconds", "Time to enqueue one broadcast for every local socket in a room")
+websocket_send_seconds = registry.histogram("websocket_send_duration_seconds", "Time to write one WebSocket message")
+mongo_pool_checkout_seconds = registry.histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection")
+mongo_pool_checkout_failures = registry.counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed, e.g. wait queue timeouts", ["reason"])
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    # Times every command the driver sends (cursor getMores included). Motor
+    # runs the driver on worker threads, hence the lock.
+    def __init__(self):
+        self.collections: Dict[int, str] = {}
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        with self.lock:
+            self.collections[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        with self.lock:
+            collection = self.collections.pop(event.request_id, "")
+            mongo_command_seconds.observe(collection, event.command_name, value=event.duration_micros / 1e6)
+
+    def failed(self, event):
+        with self.lock:
+            collection = self.collections.pop(event.request_id, "")
+            mongo_command_seconds.observe(collection, event.command_name, value=event.duration_micros / 1e6)
+            mongo_command_failures.inc(collection, event.command_name)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    # Pool saturation: connections open and checked out, operations waiting
+    # for one and for how long. A checkout starts and finishes on the same
+    # Motor worker thread, so the start time is kept per thread; the lock
+    # covers the counters and the metric updates, which run on several.
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "open": self.open,
+                "inUse": self.checked_out,
+                "idle": self.open - self.checked_out,
+                "waiting": self.waiting,
+                "maxSize": MONGO_MAX_POOL_SIZE,
+            }
+
+    def connection_check_out_started(self, event):
+        self.local.started = time.perf_counter()
+        with self.lock:
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        elapsed = time.perf_counter() - self.local.started
+        with self.lock:
+            mongo_pool_checkout_seconds.observe(value=elapsed)
+            self.waiting -= 1
+            self.checked_out += 1
+
+    def connection_check_out_failed(self, event):
+        elapsed = time.perf_counter() - self.local.started
+        with self.lock:
+            mongo_pool_checkout_seconds.observe(value=elapsed)
+            mongo_pool_checkout_failures.inc(event.reason)
+            self.waiting -= 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self.lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.open -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+# MongoDB connection settings. Operations beyond MONGO_MAX_POOL_SIZE queue for
+# a connection and give up after MONGO_WAIT_QUEUE_TIMEOUT_MS instead of piling
+# up behind a saturated pool.
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 10))
+MONGO_MAX_CONNECTING = int(os.environ.get('MONGO_MAX_CONNECTING', 4))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+READINESS_TIMEOUT = float(os.environ.get('READINESS_TIMEOUT', 1))
+
+# MongoDB connection. Nothing is opened until the lifespan warms the pool up.
+mongo_pool_metrics = MongoPoolMetrics()
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    connect=False,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxConnecting=MONGO_MAX_CONNECTING,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    event_listeners=[MongoCommandMetrics(), mongo_pool_metrics]
+)
 db = client.get_database(os.environ.get('DB_NAME', 'wordledb'))
 
-app = FastAPI()
+async def warm_up_pool():
+    # Fails startup fast if Mongo is unreachable, and opens the minimum pool
+    # up front so the first burst of requests doesn't pay for the handshakes
+    started = time.perf_counter()
+    await asyncio.gather(*(db.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+    logger.info("Warmed up the Mongo pool in %.1fms", (time.perf_counter() - started) * 1000)
+
+# Chat history settings
+MESSAGE_PAGE_SIZE = int(os.environ.get('MESSAGE_PAGE_SIZE', 50))
+MESSAGE_RETENTION = int(os.environ.get('MESSAGE_RETENTION', 1000))
+MESSAGE_TRIM_INTERVAL = int(os.environ.get('MESSAGE_TRIM_INTERVAL', 50))
+MESSAGE_BATCH_SIZE = int(os.environ.get('MESSAGE_BATCH_SIZE', 100))
+MESSAGE_FLUSH_INTERVAL = float(os.environ.get('MESSAGE_FLUSH_INTERVAL', 0.5))
+MESSAGE_MAX_PENDING = int(os.environ.get('MESSAGE_MAX_PENDING', 5000))
+MESSAGE_MAX_LENGTH = int(os.environ.get('MESSAGE_MAX_LENGTH', 1000))
+
+# Global leaderboard cache settings
+LEADERBOARD_SIZE = 10
+LEADERBOARD_CACHE_TTL = float(os.environ.get('LEADERBOARD_CACHE_TTL', 30))
+
+# Room leaderboard settings: materialized rankings are reloaded after the TTL,
+# which bounds how long scores recorded by other workers stay invisible, and
+# rooms nobody asks about drop out
+ROOM_LEADERBOARD_CACHE_SIZE = int(os.environ.get('ROOM_LEADERBOARD_CACHE_SIZE', 1024))
+ROOM_LEADERBOARD_TTL = float(os.environ.get('ROOM_LEADERBOARD_TTL', 30))
+
+# Room listing settings
+ROOM_PAGE_SIZE = int(os.environ.get('ROOM_PAGE_SIZE', 50))
+ROOM_LIST_CACHE_TTL = float(os.environ.get('ROOM_LIST_CACHE_TTL', 2))
+ROOM_LIST_CACHE_SIZE = int(os.environ.get('ROOM_LIST_CACHE_SIZE', 256))
+ROOM_MEMBER_PAGE_SIZE = int(os.environ.get('ROOM_MEMBER_PAGE_SIZE', 100))
+
+# Game session settings
+MAX_ATTEMPTS = 6
+WORDLIST_DIR = Path(os.environ.get('WORDLIST_DIR', ROOT_DIR / 'dictionaries'))
+WORDLIST_CACHE_DIR = Path(os.environ.get('WORDLIST_CACHE_DIR', WORDLIST_DIR / '.cache'))
+GAME_SESSION_TTL = int(os.environ.get('GAME_SESSION_TTL', 86400))
+DICTIONARY_BATCH_LIMIT = int(os.environ.get('DICTIONARY_BATCH_LIMIT', 5000))
+
+# Bulk word import/export settings
+WORD_IMPORT_MAX_WORDS = int(os.environ.get('WORD_IMPORT_MAX_WORDS', 50000))
+WORD_IMPORT_RETRIES = int(os.environ.get('WORD_IMPORT_RETRIES', 3))
+WORD_EXPORT_BATCH_SIZE = int(os.environ.get('WORD_EXPORT_BATCH_SIZE', 1000))
+
+# Room state cache settings
+ROOM_CACHE_MAX_ENTRIES = int(os.environ.get('ROOM_CACHE_MAX_ENTRIES', 1000))
+ROOM_CACHE_MAX_BYTES = int(os.environ.get('ROOM_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+ROOM_CACHE_TTL = float(os.environ.get('ROOM_CACHE_TTL', 10))
+
+# Room word selection settings
+ROOM_WORDS_CACHE_SIZE = int(os.environ.get('ROOM_WORDS_CACHE_SIZE', 1024))
+ROOM_DECK_TTL = float(os.environ.get('ROOM_DECK_TTL', 3600))
+
+# Request profiling settings (off unless PROFILE_TOKEN is set). The token both
+# triggers single profiles and unlocks /api/admin/profiles, so sampling with
+# PROFILE_SAMPLE_RATE needs it too: without it nobody could read the results.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+PROFILE_BUFFER_SIZE = int(os.environ.get('PROFILE_BUFFER_SIZE', 50))
+
+# WebSocket fan-out settings
+WS_QUEUE_SIZE = int(os.environ.get('WS_QUEUE_SIZE', 100))
+WS_SEND_TIMEOUT = float(os.environ.get('WS_SEND_TIMEOUT', 5))
+# Broadcasts waiting to be published to other workers (BROADCAST_BACKPLANE=mongo),
+# and how many go into one insert
+BROADCAST_QUEUE_SIZE = int(os.environ.get('BROADCAST_QUEUE_SIZE', 1000))
+BROADCAST_BATCH_SIZE = int(os.environ.get('BROADCAST_BATCH_SIZE', 100))
+
+# Rate limits: tokens per second and burst size for each bucket (a rate of 0
+# turns that limit off). Chat frames are limited per sender in a room and per
+# room; games, guesses, scores and words per username and client address.
+# Bulk imports take one token per word from a bucket of their own. Usernames
+# aren't authenticated, so each of those limits also has a bucket per client
+# address alone, RATE_LIMIT_CLIENT_FACTOR times as large (players behind one
+# NAT share it). TRUSTED_PROXIES lists the addresses (e.g. the load balancer)
+# whose X-Forwarded-For header names the real client.
+RATE_LIMIT_CHAT_RATE = float(os.environ.get('RATE_LIMIT_CHAT_RATE', 5))
+RATE_LIMIT_CHAT_BURST = int(os.environ.get('RATE_LIMIT_CHAT_BURST', 10))
+RATE_LIMIT_ROOM_CHAT_RATE = float(os.environ.get('RATE_LIMIT_ROOM_CHAT_RATE', 50))
+RATE_LIMIT_ROOM_CHAT_BURST = int(os.environ.get('RATE_LIMIT_ROOM_CHAT_BURST', 100))
+RATE_LIMIT_SCORE_RATE = float(os.environ.get('RATE_LIMIT_SCORE_RATE', 1))
+RATE_LIMIT_SCORE_BURST = int(os.environ.get('RATE_LIMIT_SCORE_BURST', 5))
+RATE_LIMIT_WORDS_RATE = float(os.environ.get('RATE_LIMIT_WORDS_RATE', 5))
+RATE_LIMIT_WORDS_BURST = int(os.environ.get('RATE_LIMIT_WORDS_BURST', 30))
+RATE_LIMIT_GAMES_RATE = float(os.environ.get('RATE_LIMIT_GAMES_RATE', 5))
+RATE_LIMIT_GAMES_BURST = int(os.environ.get('RATE_LIMIT_GAMES_BURST', 20))
+RATE_LIMIT_IMPORT_RATE = float(os.environ.get('RATE_LIMIT_IMPORT_RATE', 500))
+RATE_LIMIT_IMPORT_BURST = int(os.environ.get('RATE_LIMIT_IMPORT_BURST', WORD_IMPORT_MAX_WORDS))
+RATE_LIMIT_CLIENT_FACTOR = float(os.environ.get('RATE_LIMIT_CLIENT_FACTOR', 4))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+TRUSTED_PROXIES = {address.strip() for address in os.environ.get('TRUSTED_PROXIES', '').split(',') if address.strip()}
+
+async def prepare_database():
+    await warm_up_pool()
+    await ensure_indexes()
+    await migrate_embedded_members()
+    await migrate_embedded_messages()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup is on the readiness path of every new replica, so independent
+    # steps run side by side. Word lists build missing matrices on first run,
+    # otherwise they are just memory-mapped; either way that overlaps with
+    # connecting to Mongo and checking the indexes.
+    await asyncio.gather(
+        asyncio.get_running_loop().run_in_executor(None, word_lists.ensure_loaded),
+        prepare_database()
+    )
+    await manager.backplane.start()
+    await message_writer.start()
+    # Diagnostics only, so they don't hold up serving
+    scan_report = asyncio.create_task(report_collection_scans())
+    try:
+        yield
+    finally:
+        scan_report.cancel()
+        await manager.backplane.stop()
+        # Write out any buffered chat before the client goes away
+        await message_writer.stop()
+        client.close()
+
+# The default class only swaps the final encode; hot handlers return a
+# FastJSONResponse themselves to also skip the jsonable_encoder pass
+app = FastAPI(lifespan=lifespan, default_response_class=serialization.FastJSONResponse)
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (no per-request task or body buffering) timing
+    # every HTTP request under its route template
+    def __init__(self, app):
+        self.app = app
+        self.routes: Optional[Dict[Any, str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_seconds.observe(scope["method"], self.route(scope), str(status), value=time.perf_counter() - started)
+
+    def route(self, scope) -> str:
+        # The router leaves the matched endpoint in the scope; map it back to
+        # the path template so ids don't explode the label space
+        if self.routes is None:
+            self.routes = {route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")}
+        return self.routes.get(scope.get("endpoint"), "unmatched")
+
+app.add_middleware(MetricsMiddleware)
+
+profiler = profiling.Profiler(PROFILE_INTERVAL, PROFILE_BUFFER_SIZE)
+if PROFILE_SAMPLE_RATE > 0 and not PROFILE_TOKEN:
+    logger.warning("PROFILE_SAMPLE_RATE is set without PROFILE_TOKEN; request profiling stays off")
+if PROFILE_TOKEN:
+    # Send `X-Profile: <PROFILE_TOKEN>` to profile a single request
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        profiler=profiler,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        header="X-Profile",
+        token=PROFILE_TOKEN
+    )
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,14 +384,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id", "X-Request-Id"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Outermost, so the request id covers everything logged while serving
+app.add_middleware(logs.LogContextMiddleware)
 
 # Models
 class User(BaseModel):
@@ -69,10 +402,19 @@ class UserInDB(User):
 
 class Score(BaseModel):
     username: str
-    won: bool
-    word: str
-    attempts: int
+    gameId: str
+
+class GameStart(BaseModel):
+    username: str
     roomId: Optional[str] = None
+    noRepeat: bool = False
+
+class Guess(BaseModel):
+    username: str
+    guess: str
+
+class WordCheck(BaseModel):
+    words: List[str]
 
 class Message(BaseModel):
     content: str
@@ -107,38 +449,1279 @@ class Room(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     host: str
-    members: List[str] = []
+    # Members live in the room_members collection
+    memberCount: int = 0
     words: List[Word] = []
-    messages: List[Dict] = []
     isPrivate: bool = False
     password: Optional[str] = None
     description: Optional[str] = None
     createdAt: datetime = Field(default_factory=datetime.now)
+    # Bumped by every write, see RoomCache
+    version: int = 0
+
+# Broadcast backplane
+# Carries room broadcasts between worker processes/replicas. Each worker
+# publishes to the backplane and delivers whatever it receives to the sockets
+# it holds locally (ConnectionManager.deliver).
+class Backplane:
+    def bind(self, deliver: Callable[[str, str], Awaitable[None]]):
+        self.deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def publish(self, room_id: str, message: str):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+class InMemoryBackplane(Backplane):
+    # Single process: publishing is local delivery
+    async def start(self):
+        workers = configured_workers()
+        if workers > 1:
+            logger.warning(
+                "Running %d workers with the in-memory broadcast backplane: chat and "
+                "leaderboard updates only reach sockets on the same worker. "
+                "Set BROADCAST_BACKPLANE=mongo.", workers
+            )
+
+    async def publish(self, room_id: str, message: str):
+        await self.deliver(room_id, message)
+
+class MongoChangeStreamBackplane(Backplane):
+    # Multi-worker/multi-node: every broadcast is inserted into a short-lived
+    # collection and each worker tails it through a change stream (requires
+    # MongoDB running as a replica set)
+    def __init__(self, collection, ttl_seconds: int = 60, queue_size: int = 1000, batch_size: int = 100):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.node_id = str(uuid.uuid4())
+        self.resume_token = None
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.listener: Optional[asyncio.Task] = None
+        self.publisher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Recreate the queue on the serving event loop
+        self.queue = asyncio.Queue(self.queue_size)
+        await self.collection.create_index("createdAt", expireAfterSeconds=self.ttl_seconds)
+        self.listener = asyncio.create_task(self._listen())
+        self.publisher = asyncio.create_task(self._publish())
+
+    async def publish(self, room_id: str, message: str):
+        # Deliver locally right away; the insert other workers pick up from the
+        # stream is batched in the background, so the sender doesn't wait on a
+        # Mongo round trip (only on a full queue, as backpressure)
+        await self.deliver(room_id, message)
+        await self.queue.put({
+            "roomId": room_id,
+            "message": message,
+            "origin": self.node_id,
+            "createdAt": datetime.now()
+        })
+
+    async def stop(self):
+        for task in (self.listener, self.publisher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.listener = self.publisher = None
+        # Publish what was still queued
+        while not self.queue.empty():
+            try:
+                await self.collection.insert_many(self._batch(self.batch_size), ordered=True)
+            except Exception as e:
+                logger.error("Error publishing broadcasts on shutdown: %s", e)
+                break
+
+    def _batch(self, limit: int) -> List[Dict]:
+        batch = []
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _publish(self):
+        while True:
+            batch = [await self.queue.get()] + self._batch(self.batch_size - 1)
+            # Ordered, so other workers see a room's messages in send order
+            while True:
+                try:
+                    await self.collection.insert_many(batch, ordered=True)
+                    break
+                except BulkWriteError as e:
+                    # Resend only what wasn't inserted; a duplicate _id means an
+                    # earlier attempt stored that one and only the reply was lost
+                    errors = e.details.get("writeErrors") or [{}]
+                    written = e.details.get("nInserted", 0) + (errors[0].get("code") == 11000)
+                    batch = batch[written:]
+                    if not batch:
+                        break
+                    logger.error("Error publishing %d broadcasts: %s", len(batch), e)
+                except Exception as e:
+                    logger.error("Error publishing %d broadcasts: %s", len(batch), e)
+                await asyncio.sleep(1)
+
+    async def _listen(self):
+        pipeline = [{"$match": {"operationType": "insert", "fullDocument.origin": {"$ne": self.node_id}}}]
+        while True:
+            try:
+                async with self.collection.watch(pipeline, resume_after=self.resume_token) as stream:
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        document = change["fullDocument"]
+                        await self.deliver(document["roomId"], document["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Backplane change stream error: %s", e)
+                await asyncio.sleep(1)
+
+def configured_workers() -> int:
+    # Worker count from the server's command line (uvicorn --workers, gunicorn
+    # -w; spawned and forked workers both keep it in sys.argv), else
+    # WEB_CONCURRENCY, which both servers default to
+    args = sys.argv[1:]
+    for i, arg in enumerate(args):
+        for flag in ("--workers", "-w"):
+            if arg == flag and i + 1 < len(args):
+                value = args[i + 1]
+            elif arg.startswith(flag + "="):
+                value = arg[len(flag) + 1:]
+            elif flag == "-w" and arg.startswith("-w") and arg[2:].isdigit():
+                value = arg[2:]
+            else:
+                continue
+            return int(value) if value.isdigit() else 1
+    value = os.environ.get('WEB_CONCURRENCY', '1')
+    return int(value) if value.isdigit() else 1
+
+def create_backplane() -> Backplane:
+    kind = os.environ.get('BROADCAST_BACKPLANE', 'memory')
+    if kind == 'memory':
+        return InMemoryBackplane()
+    if kind == 'mongo':
+        return MongoChangeStreamBackplane(db.broadcasts, queue_size=BROADCAST_QUEUE_SIZE, batch_size=BROADCAST_BATCH_SIZE)
+    raise ValueError(f"Unknown BROADCAST_BACKPLANE: {kind}")
 
 # WebSocket Connection Manager
+# Every socket gets its own bounded outbound queue drained by a writer task, so
+# broadcast() only enqueues: a slow or dead client can't stall the room, and
+# clients whose queue overflows or whose send times out are evicted.
+class ClientConnection:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(self, backplane: Optional["Backplane"] = None):
+        self.active_connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        # Per room while it has sockets here; totals for the life of the process
+        self.send_stats: Dict[str, Dict[str, Any]] = {}
+        self.totals = {"sent": 0, "failed": 0, "evicted": 0}
+        self.backplane = backplane or InMemoryBackplane()
+        self.backplane.bind(self.deliver)
 
     async def connect(self, websocket: WebSocket, room_id: str):
         await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append(websocket)
+        connection = ClientConnection(websocket)
+        connection.writer = asyncio.create_task(self._writer(connection, room_id))
+        self.active_connections.setdefault(room_id, {})[websocket] = connection
 
     def disconnect(self, websocket: WebSocket, room_id: str):
-        if room_id in self.active_connections:
-            if websocket in self.active_connections[room_id]:
-                self.active_connections[room_id].remove(websocket)
-            if len(self.active_connections[room_id]) == 0:
-                del self.active_connections[room_id]
+        connections = self.active_connections.get(room_id)
+        if connections is None:
+            return
+        connection = connections.pop(websocket, None)
+        if connection is not None and connection.writer is not None:
+            if connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
+        if len(connections) == 0:
+            del self.active_connections[room_id]
+            self.send_stats.pop(room_id, None)
+
+    def send_to(self, websocket: WebSocket, room_id: str, message: Any):
+        # Queue a message for one local client only; dropped if its queue is full
+        connection = self.active_connections.get(room_id, {}).get(websocket)
+        if connection is None:
+            return
+        if not isinstance(message, str):
+            message = serialization.dumps_text(message)
+        try:
+            connection.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def broadcast(self, message: Any, room_id: str):
+        # Serialize once for the whole room, then hand it to the backplane so
+        # clients connected to other workers receive it too
+        if not isinstance(message, str):
+            message = serialization.dumps_text(message)
+        await self.backplane.publish(room_id, message)
+
+    async def deliver(self, room_id: str, message: str):
+        connections = self.active_connections.get(room_id)
+        if not connections:
+            return
+        
+        started = time.perf_counter()
+        for connection in list(connections.values()):
+            try:
+                connection.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("Evicting slow WebSocket client in room %s: outbound queue full", room_id, extra={"room_id": room_id})
+                self._evict(connection, room_id)
+        broadcast_fanout_seconds.observe(value=time.perf_counter() - started)
+
+    def room_stats(self, room_id: str) -> Dict[str, Any]:
+        stats = self.send_stats.get(room_id) or self._empty_stats()
+        return {
+            "connections": len(self.active_connections.get(room_id, {})),
+            "sent": stats["sent"],
+            "failed": stats["failed"],
+            "evicted": stats["evicted"],
+            "avgSendMs": round(stats["totalSeconds"] / stats["sent"] * 1000, 3) if stats["sent"] else 0,
+            "maxSendMs": round(stats["maxSeconds"] * 1000, 3)
+        }
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {"sent": 0, "failed": 0, "evicted": 0, "totalSeconds": 0.0, "maxSeconds": 0.0}
+
+    def _stats(self, room_id: str) -> Dict[str, Any]:
+        stats = self.send_stats.get(room_id)
+        if stats is None:
+            stats = self._empty_stats()
+            # Not kept for rooms whose last socket already left
+            if room_id in self.active_connections:
+                self.send_stats[room_id] = stats
+        return stats
+
+    async def _writer(self, connection: ClientConnection, room_id: str):
+        while True:
+            message = await connection.queue.get()
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(connection.websocket.send_text(message), WS_SEND_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Evicting WebSocket client in room %s: %s %s", room_id, type(e).__name__, e, extra={"room_id": room_id})
+                self._stats(room_id)["failed"] += 1
+                self.totals["failed"] += 1
+                self._evict(connection, room_id)
+                return
+            
+            elapsed = time.perf_counter() - started
+            websocket_send_seconds.observe(value=elapsed)
+            stats = self._stats(room_id)
+            stats["sent"] += 1
+            self.totals["sent"] += 1
+            stats["totalSeconds"] += elapsed
+            if elapsed > stats["maxSeconds"]:
+                stats["maxSeconds"] = elapsed
+
+    def _evict(self, connection: ClientConnection, room_id: str):
+        self._stats(room_id)["evicted"] += 1
+        self.totals["evicted"] += 1
+        self.disconnect(connection.websocket, room_id)
+        # Close in the background; the client may be too slow to complete the handshake
+        asyncio.create_task(self._close(connection.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+
+manager = ConnectionManager(create_backplane())
+
+# Totals only: a room label would leave a series behind for every room ever
+# opened. Per-room figures are on /api/broadcast/stats.
+registry.gauge(
+    "websocket_connections", "Open WebSocket connections",
+    callback=lambda: {(): sum(len(connections) for connections in manager.active_connections.values())})
+registry.gauge(
+    "websocket_queued_messages", "Messages waiting in WebSocket outbound queues",
+    callback=lambda: {(): sum(
+        connection.queue.qsize()
+        for connections in manager.active_connections.values()
+        for connection in connections.values()
+    )})
+registry.counter("websocket_messages_sent_total", "WebSocket messages sent", callback=lambda: {(): manager.totals["sent"]})
+registry.counter("websocket_send_failures_total", "WebSocket sends that failed", callback=lambda: {(): manager.totals["failed"]})
+registry.counter("websocket_evictions_total", "WebSocket clients evicted", callback=lambda: {(): manager.totals["evicted"]})
+registry.gauge("mongo_pool_connections", "Pooled MongoDB connections by state", ["state"],
+               callback=lambda: {(state,): mongo_pool_metrics.stats()[key] for state, key in (("in_use", "inUse"), ("idle", "idle"))})
+registry.gauge("mongo_pool_wait_queue", "Operations waiting for a pooled MongoDB connection",
+               callback=lambda: {(): mongo_pool_metrics.stats()["waiting"]})
+registry.gauge("mongo_pool_max_size", "Configured MongoDB pool size", callback=lambda: {(): MONGO_MAX_POOL_SIZE})
+registry.counter("room_cache_events_total", "Room state cache hits, misses, write-throughs, invalidations and evictions", ["event"],
+                 callback=lambda: {(event,): count for event, count in room_cache.stats.items()})
+registry.gauge("room_cache_entries", "Rooms held in the state cache", callback=lambda: {(): len(room_cache.entries)})
+registry.gauge("room_cache_bytes", "Estimated size of the room state cache", callback=lambda: {(): room_cache.bytes})
+registry.counter("leaderboard_cache_events_total", "Global leaderboard cache hits, misses, 304s and in-place patches", ["event"],
+                 callback=lambda: {(event,): count for event, count in leaderboard_cache.stats.items()})
+registry.gauge("leaderboard_cache_entries", "Players held in the cached global leaderboard",
+               callback=lambda: {(): len(leaderboard_cache.entries or ())})
+registry.counter("chat_messages_dropped_total", "Chat messages dropped because Mongo rejected them",
+                 callback=lambda: {(): message_writer.dropped})
+registry.gauge("log_queue_records", "Log records waiting for the writer thread", callback=lambda: {(): log_config.stats()["queued"]})
+registry.counter("log_records_dropped_total", "Log records dropped because the queue was full", callback=lambda: {(): log_config.stats()["dropped"]})
+registry.counter("log_records_sampled_out_total", "High-volume log records skipped by sampling", callback=lambda: {(): log_config.stats()["sampledOut"]})
+
+# Rate limiting
+# Token buckets in front of the writes a single client can otherwise repeat as
+# fast as it likes: chat frames (a Mongo write and a room-wide broadcast each),
+# games and guesses (which record scores), score submissions and word additions
+# and imports.
+rate_limiters = {
+    "chat": ratelimit.TokenBucketLimiter(RATE_LIMIT_CHAT_RATE, RATE_LIMIT_CHAT_BURST, RATE_LIMIT_MAX_KEYS),
+    "room_chat": ratelimit.TokenBucketLimiter(RATE_LIMIT_ROOM_CHAT_RATE, RATE_LIMIT_ROOM_CHAT_BURST, RATE_LIMIT_MAX_KEYS),
+    "scores": ratelimit.TokenBucketLimiter(RATE_LIMIT_SCORE_RATE, RATE_LIMIT_SCORE_BURST, RATE_LIMIT_MAX_KEYS),
+    "words": ratelimit.TokenBucketLimiter(RATE_LIMIT_WORDS_RATE, RATE_LIMIT_WORDS_BURST, RATE_LIMIT_MAX_KEYS),
+    "word_imports": ratelimit.TokenBucketLimiter(RATE_LIMIT_IMPORT_RATE, RATE_LIMIT_IMPORT_BURST, RATE_LIMIT_MAX_KEYS),
+    "games": ratelimit.TokenBucketLimiter(RATE_LIMIT_GAMES_RATE, RATE_LIMIT_GAMES_BURST, RATE_LIMIT_MAX_KEYS),
+}
+# The per-address bucket behind each per-user one ("chat" -> "chat_client")
+for _name in ("chat", "scores", "words", "word_imports", "games"):
+    _limiter = rate_limiters[_name]
+    rate_limiters[f"{_name}_client"] = ratelimit.TokenBucketLimiter(
+        _limiter.rate * RATE_LIMIT_CLIENT_FACTOR, int(_limiter.burst * RATE_LIMIT_CLIENT_FACTOR), RATE_LIMIT_MAX_KEYS)
+
+def rate_limit_metric(field: str) -> Callable[[], Dict]:
+    return lambda: {(name,): limiter.stats[field] for name, limiter in rate_limiters.items()}
+
+registry.counter("rate_limit_allowed_total", "Calls let through by each rate limiter", ["limiter"], callback=rate_limit_metric("allowed"))
+registry.counter("rate_limit_rejected_total", "Calls rejected by each rate limiter", ["limiter"], callback=rate_limit_metric("rejected"))
+registry.gauge("rate_limit_buckets", "Keys tracked by each rate limiter", ["limiter"],
+               callback=lambda: {(name,): len(limiter.buckets) for name, limiter in rate_limiters.items()})
+
+def client_address(connection: HTTPConnection) -> Optional[str]:
+    # The peer address, or behind a trusted proxy the last X-Forwarded-For hop
+    # it didn't add itself (earlier entries are whatever the client sent)
+    address = connection.client.host if connection.client else None
+    if address not in TRUSTED_PROXIES:
+        return address
+    hops = [hop.strip() for hop in ",".join(connection.headers.getlist("x-forwarded-for")).split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in TRUSTED_PROXIES:
+            return hop
+    return address
+
+def allow_client(name: str, address: Optional[str], username: str, cost: int = 1) -> Optional[tuple]:
+    # Charges the address's bucket, then the username's at that address (so
+    # claiming someone's name from another address doesn't use up their
+    # allowance, and rotating names doesn't get past the address's). Returns
+    # the rejecting limiter and key, or None if the call is allowed
+    checks = ((rate_limiters[f"{name}_client"], address), (rate_limiters[name], (username, address)))
+    for limiter, key in checks:
+        if not limiter.allow(key, cost):
+            return limiter, key
+    return None
+
+def enforce_rate_limit(name: str, request: Request, username: str, cost: int = 1):
+    rejected = allow_client(name, client_address(request), username, cost)
+    if rejected:
+        limiter, key = rejected
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(limiter.retry_after(key, cost))}
+        )
+
+# Game engine
+# Target words stay on the server: clients start a session, submit guesses and
+# get per-letter feedback back. Scores are only recorded from finished sessions.
+
+# Dictionaries by word length with precomputed feedback matrices (loaded at
+# startup, or on first use). They are also the dictionary that guesses and room
+# words are validated against; lengths without a dictionary are unrestricted.
+word_lists = wordlists.WordLists(WORDLIST_DIR, WORDLIST_CACHE_DIR)
+
+# Feedback is packed base 3, little endian: digit i is the status of letter i
+ABSENT, PRESENT, CORRECT = 0, 1, 2
+FEEDBACK_NAMES = ("absent", "present", "correct")
+# Longest word a game can be played with (the tables below are sized for it)
+MAX_WORD_LENGTH = 15
+_POW3 = tuple(3 ** i for i in range(MAX_WORD_LENGTH + 1))
+_SOLVED = tuple(sum(CORRECT * _POW3[i] for i in range(n)) for n in range(MAX_WORD_LENGTH + 1))
+# Scratch letter counts shared by every call; always zeroed again before returning
+_letter_counts = [0] * 256
+
+def score_guess(guess: bytes, answer: bytes) -> int:
+    # Two passes over the letters with no per-call allocations: greens are
+    # tracked in a bitmask and unmatched answer letters in the scratch table
+    counts = _letter_counts
+    n = len(answer)
+    green = 0
+    for i in range(n):
+        a = answer[i]
+        if guess[i] == a:
+            green |= 1 << i
+        else:
+            counts[a] += 1
+    
+    pattern = 0
+    for i in range(n):
+        if green >> i & 1:
+            pattern += CORRECT * _POW3[i]
+        else:
+            g = guess[i]
+            if counts[g]:
+                counts[g] -= 1
+                pattern += PRESENT * _POW3[i]
+    
+    for i in range(n):
+        counts[answer[i]] = 0
+    return pattern
+
+def decode_feedback(pattern: int, length: int) -> List[str]:
+    feedback = []
+    for _ in range(length):
+        feedback.append(FEEDBACK_NAMES[pattern % 3])
+        pattern //= 3
+    return feedback
+
+def is_solved(pattern: int, length: int) -> bool:
+    return pattern == _SOLVED[length]
+
+def evaluate_guess(guess: str, answer: str, row: Optional[int] = None) -> int:
+    # Matrix lookup for dictionary words, kernel for custom room words. `row`
+    # is the guess's index in its word list when the caller already looked it
+    # up, which saves the second search that makes a lookup cost as much as
+    # scoring
+    word_list = word_lists.get(len(answer))
+    if word_list is None:
+        pattern = None
+    elif row is None:
+        pattern = word_list.feedback(guess, answer)
+    else:
+        pattern = word_list.feedback_at(row, answer)
+    if pattern is None:
+        pattern = score_guess(guess.encode(), answer.encode())
+    return pattern
+
+# Room leaderboard aggregation
+def room_leaderboard_pipeline(room_id: str) -> List[Dict]:
+    return [
+        {"$match": {"roomId": room_id}},
+        {"$group": {
+            "_id": "$username",
+            "gamesPlayed": {"$sum": 1},
+            "wordsSolved": {"$sum": {"$cond": ["$won", 1, 0]}},
+            "totalAttempts": {"$sum": {"$cond": ["$won", {"$ifNull": ["$attempts", 6]}, 0]}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "username": "$_id",
+            "gamesPlayed": 1,
+            "wordsSolved": 1,
+            "totalAttempts": 1,
+            "avgAttempts": {"$cond": [
+                {"$gt": ["$wordsSolved", 0]},
+                {"$round": [{"$divide": ["$totalAttempts", "$wordsSolved"]}, 1]},
+                0
+            ]}
+        }},
+        # Sort by words solved (desc) and avg attempts (asc)
+        {"$sort": {"wordsSolved": -1, "avgAttempts": 1, "username": 1}}
+    ]
+
+# Small bounded cache with per-entry expiry (counted from set(); reads don't
+# extend it) that evicts the least recently used entries past maxsize
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: Any):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+# Materialized room leaderboards
+# Each room's ranking is loaded once from the games collection and then kept
+# up to date in-process by update_score, which broadcasts only the changed row.
+class RoomLeaderboard:
+    def __init__(self, entries: List[Dict]):
+        self.stats: Dict[str, Dict] = {}
+        self.order: List[tuple] = []
+        for entry in entries:
+            self.stats[entry["username"]] = {
+                "username": entry["username"],
+                "gamesPlayed": entry["gamesPlayed"],
+                "wordsSolved": entry["wordsSolved"],
+                "totalAttempts": entry["totalAttempts"],
+                "avgAttempts": entry["avgAttempts"]
+            }
+        self.order = sorted(self._key(stats) for stats in self.stats.values())
+
+    @staticmethod
+    def _key(stats: Dict) -> tuple:
+        return (-stats["wordsSolved"], stats["avgAttempts"], stats["username"])
+
+    def record(self, username: str, won: bool, attempts: int) -> Dict:
+        stats = self.stats.get(username)
+        previous_rank = None
+        if stats is None:
+            stats = {"username": username, "gamesPlayed": 0, "wordsSolved": 0, "totalAttempts": 0, "avgAttempts": 0}
+            self.stats[username] = stats
+        else:
+            # Binary search the old position and drop it. Finding a position
+            # is O(log n); the list delete and insert below shift the entries
+            # after it (a memmove, O(n) but cheap at room sizes)
+            index = bisect.bisect_left(self.order, self._key(stats))
+            del self.order[index]
+            previous_rank = index + 1
+        
+        stats["gamesPlayed"] += 1
+        if won:
+            stats["wordsSolved"] += 1
+            stats["totalAttempts"] += attempts
+            stats["avgAttempts"] = round(stats["totalAttempts"] / stats["wordsSolved"], 1)
+        
+        key = self._key(stats)
+        index = bisect.bisect_left(self.order, key)
+        self.order.insert(index, key)
+        
+        return {
+            "type": "leaderboard",
+            "entry": self._public(stats),
+            "rank": index + 1,
+            "previousRank": previous_rank
+        }
+
+    def ranking(self) -> List[Dict]:
+        return [self._public(self.stats[key[2]]) for key in self.order]
+
+    @staticmethod
+    def _public(stats: Dict) -> Dict:
+        return {
+            "username": stats["username"],
+            "gamesPlayed": stats["gamesPlayed"],
+            "wordsSolved": stats["wordsSolved"],
+            "avgAttempts": stats["avgAttempts"]
+        }
+
+# Each worker only sees the scores it records itself, so a leaderboard is
+# reloaded from the games collection once it is ROOM_LEADERBOARD_TTL old
+room_leaderboards = TTLCache(ROOM_LEADERBOARD_CACHE_SIZE, ROOM_LEADERBOARD_TTL)
+# Only held while someone is loading or recording, then garbage collected
+_room_leaderboard_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def room_leaderboard_lock(room_id: str) -> asyncio.Lock:
+    # Serializes loading a room's leaderboard with recording scores into it,
+    # so a game is never counted by both the aggregation and record()
+    lock = _room_leaderboard_locks.get(room_id)
+    if lock is None:
+        lock = _room_leaderboard_locks[room_id] = asyncio.Lock()
+    return lock
+
+async def cached_room_leaderboard(room_id: str) -> RoomLeaderboard:
+    # Caller holds room_leaderboard_lock(room_id)
+    leaderboard = room_leaderboards.get(room_id)
+    if leaderboard is None:
+        cursor = db.games.aggregate(room_leaderboard_pipeline(room_id))
+        leaderboard = RoomLeaderboard(await cursor.to_list(length=None))
+        room_leaderboards.set(room_id, leaderboard)
+    return leaderboard
+
+async def load_room_leaderboard(room_id: str) -> RoomLeaderboard:
+    async with room_leaderboard_lock(room_id):
+        return await cached_room_leaderboard(room_id)
+
+def drop_room_leaderboard(room_id: str):
+    room_leaderboards.pop(room_id)
+
+# Chat history helpers
+# Messages live in their own collection (one document per message) instead of
+# being pushed into the room document, so rooms stay small and history can be
+# paged with the `_id` as a time-ordered cursor.
+class MessageWriter:
+    # Write-behind buffer: messages are queued per room and written with one
+    # insert_many per room when a batch fills up or every flush interval.
+    # Ids are assigned when queued, so ordering and paging cursors are stable
+    # before the write lands.
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.buffers: Dict[str, List[Dict]] = {}
+        self.pending = 0
+        self.dropped = 0
+        self.since_trim: Dict[str, int] = {}
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.flusher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Recreate the primitives on the serving event loop
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+        self.flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.flusher is not None:
+            self.flusher.cancel()
+            try:
+                await self.flusher
+            except asyncio.CancelledError:
+                pass
+            self.flusher = None
+        await self.flush()
+
+    async def add(self, room_id: str, message: Dict):
+        # Backpressure: once too much is buffered, the producer waits for Mongo
+        while self.pending >= self.max_pending:
+            if not await self.flush():
+                await asyncio.sleep(self.flush_interval)
+        
+        message["_id"] = ObjectId()
+        buffer = self.buffers.setdefault(room_id, [])
+        buffer.append(message)
+        self.pending += 1
+        if len(buffer) >= self.batch_size:
+            self.wakeup.set()
+
+    def buffered(self, room_id: str) -> List[Dict]:
+        return self.buffers.get(room_id, [])
+
+    async def flush(self) -> bool:
+        async with self.lock:
+            ok = True
+            for room_id in list(self.buffers):
+                batch = self.buffers.pop(room_id)
+                try:
+                    await db.messages.insert_many(batch, ordered=True)
+                except BulkWriteError as e:
+                    # The insert stopped at the first failed document: what came
+                    # before it is stored, the rest goes back for the next attempt
+                    written = self._written(batch, e.details, room_id)
+                    self.buffers[room_id] = batch[written:] + self.buffers.get(room_id, [])
+                    self.pending -= written
+                    self.wakeup.set()
+                    batch = batch[:written]
+                except Exception as e:
+                    logger.error("Error flushing %d messages for room %s: %s", len(batch), room_id, e, extra={"room_id": room_id})
+                    # Keep them (in order) for the next attempt
+                    self.buffers[room_id] = batch + self.buffers.get(room_id, [])
+                    ok = False
+                    continue
+                else:
+                    self.pending -= len(batch)
+                
+                # Trim old history every MESSAGE_TRIM_INTERVAL inserts instead of on every message
+                count = self.since_trim.get(room_id, 0) + len(batch)
+                if count >= MESSAGE_TRIM_INTERVAL:
+                    count = 0
+                    await trim_messages(room_id)
+                self.since_trim[room_id] = count
+            return ok
+
+    def _written(self, batch: List[Dict], details: Dict, room_id: str) -> int:
+        # How many documents of the batch are settled: the inserted prefix plus
+        # the failed one, which is either already stored (a duplicate _id from
+        # an earlier attempt whose reply was lost) or can never be stored and
+        # is dropped rather than retried forever
+        errors = details.get("writeErrors") or []
+        if not errors:
+            return details.get("nInserted", 0)
+        error = errors[0]
+        index = error.get("index", details.get("nInserted", 0))
+        if error.get("code") != 11000:
+            self.dropped += 1
+            logger.error("Dropping message %s for room %s: %s", batch[index].get("_id"), room_id, error.get("errmsg"), extra={"room_id": room_id})
+        return index + 1
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+message_writer = MessageWriter(MESSAGE_BATCH_SIZE, MESSAGE_FLUSH_INTERVAL, MESSAGE_MAX_PENDING)
+
+async def store_message(room_id: str, message: Dict):
+    await message_writer.add(room_id, {**message, "roomId": room_id, "createdAt": datetime.now()})
+
+async def trim_messages(room_id: str):
+    # Find the oldest message we keep and delete everything before it
+    cursor = db.messages.find({"roomId": room_id}, {"_id": 1}).sort("_id", -1).skip(MESSAGE_RETENTION - 1).limit(1)
+    oldest_kept = await cursor.to_list(length=1)
+    if oldest_kept:
+        await db.messages.delete_many({"roomId": room_id, "_id": {"$lt": oldest_kept[0]["_id"]}})
+
+async def fetch_messages(room_id: str, before: Optional[ObjectId] = None, limit: int = MESSAGE_PAGE_SIZE) -> List[Dict]:
+    query: Dict[str, Any] = {"roomId": room_id}
+    if before is not None:
+        query["_id"] = {"$lt": before}
+    
+    cursor = db.messages.find(query, {"roomId": 0, "createdAt": 0}).sort("_id", -1).limit(limit)
+    messages = await cursor.to_list(length=limit)
+    
+    # Include messages still waiting in the write-behind buffer
+    buffered = [
+        {key: value for key, value in message.items() if key not in ("roomId", "createdAt")}
+        for message in message_writer.buffered(room_id)
+        if before is None or message["_id"] < before
+    ]
+    if buffered:
+        messages = sorted(messages + buffered, key=lambda message: message["_id"], reverse=True)[:limit]
+    
+    # Return oldest first so the client can append in order
+    messages.reverse()
+    for message in messages:
+        message["id"] = str(message.pop("_id"))
+    return messages
+
+def legacy_message(room_id: str, index: int, message: Dict, fallback: datetime) -> Dict:
+    # The _id is derived from the message's timestamp, the room and the
+    # position in the old array: ids sort in the old order, before any new
+    # message, and a rerun of an interrupted migration produces the same ones
+    try:
+        sent_at = datetime.fromisoformat(message["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        sent_at = fallback
+    suffix = hashlib.sha1(room_id.encode()).digest()[:4] + index.to_bytes(4, "big")
+    message_id = ObjectId(int(max(sent_at.timestamp(), 0)).to_bytes(4, "big") + suffix)
+    return {**message, "_id": message_id, "roomId": room_id, "createdAt": sent_at}
+
+async def migrate_embedded_messages():
+    # One-off move of the messages arrays rooms used to embed into messages
+    if await db.migrations.find_one({"_id": "messages"}):
+        return
+    
+    migrated = 0
+    async for room in db.rooms.find({"messages": {"$exists": True}}, {"_id": 0, "id": 1, "messages": 1, "createdAt": 1}):
+        history = room.get("messages") or []
+        # Only what retention would have kept anyway
+        start = max(len(history) - MESSAGE_RETENTION, 0)
+        fallback = room.get("createdAt") or datetime.now()
+        documents = [
+            legacy_message(room["id"], index, message, fallback)
+            for index, message in enumerate(history[start:], start)
+            if isinstance(message, dict)
+        ]
+        if documents:
+            try:
+                await db.messages.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                # Already copied by an earlier, interrupted run
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+        await db.rooms.update_one({"id": room["id"]}, {"$unset": {"messages": ""}, "$inc": {"version": 1}})
+        room_cache.pop(room["id"])
+        migrated += 1
+    
+    await db.migrations.update_one({"_id": "messages"}, {"$set": {"completedAt": datetime.now()}}, upsert=True)
+    if migrated:
+        logger.info("Moved the chat history of %d rooms into messages", migrated)
+
+# Global leaderboard cache
+# The top players only change when a score is recorded, so the list is cached
+# in-process and patched by update_score; the TTL bounds staleness from writes
+# made by other workers. The ETag is a content hash, so it agrees across workers.
+class LeaderboardCache:
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self.entries: Optional[List[Dict]] = None
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.expires_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "notModified": 0, "patches": 0}
+
+    def get(self) -> Optional[List[Dict]]:
+        if self.entries is not None and time.monotonic() < self.expires_at:
+            self.stats["hits"] += 1
+            return self.entries
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, entries: List[Dict]):
+        # Encoded once here; every response until the next change reuses it
+        self.entries = entries
+        self.body = serialization.dumps(entries)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.expires_at = time.monotonic() + self.ttl
+
+    def record(self, user: Dict):
+        # Patch a user's new totals into the cached list
+        if self.entries is None:
+            return
+        entries = [entry for entry in self.entries if entry["username"] != user["username"]]
+        entries.append({
+            "username": user["username"],
+            "wordsSolved": user.get("wordsSolved", 0),
+            "gamesPlayed": user.get("gamesPlayed", 0)
+        })
+        # Stable sort keeps the existing order among ties
+        entries.sort(key=lambda entry: -entry["wordsSolved"])
+        self.stats["patches"] += 1
+        
+        expires_at = self.expires_at
+        self.store(entries[:self.size])
+        self.expires_at = expires_at
+
+leaderboard_cache = LeaderboardCache(LEADERBOARD_SIZE, LEADERBOARD_CACHE_TTL)
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match or etag is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+# Room listing
+room_list_cache = TTLCache(ROOM_LIST_CACHE_SIZE, ROOM_LIST_CACHE_TTL)
+
+def encode_room_cursor(room: Dict) -> str:
+    raw = f"{room['createdAt'].isoformat()}|{room['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_room_cursor(cursor: str) -> tuple:
+    created_at, room_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    return datetime.fromisoformat(created_at), room_id
+
+def room_list_pipeline(filter_query: Dict, limit: int) -> List[Dict]:
+    return [
+        {"$match": filter_query},
+        {"$sort": {"createdAt": -1, "id": -1}},
+        {"$limit": limit},
+        # Only counts leave the server, never the embedded arrays
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "name": 1,
+            "host": 1,
+            "memberCount": {"$ifNull": ["$memberCount", 0]},
+            "isPrivate": {"$ifNull": ["$isPrivate", False]},
+            "description": 1,
+            "wordCount": {"$size": {"$ifNull": ["$words", []]}},
+            "createdAt": 1
+        }}
+    ]
+
+# Room state cache
+# Hot rooms are served from memory: the room document without chat or the
+# password, plus the word list and set and a hash of the password. Every room write bumps the document's version and goes through
+# update_room, which patches the cached copy when it was current (cached
+# version == new version - 1) and drops it otherwise, so an interleaved write
+# is never papered over. Bounded by entry count and estimated size, least
+# recently used out first; the TTL bounds staleness from other workers' writes.
+ROOM_BASE_BYTES = 1024
+ROOM_WORD_BYTES = 400
+
+def hash_password(password: Optional[str]) -> Optional[bytes]:
+    return hashlib.sha256(password.encode()).digest() if password else None
+
+class CachedRoom:
+    def __init__(self, document: Dict):
+        self.password_hash = hash_password(document.pop("password", None))
+        document.pop("messages", None)
+        document.pop("scores", None)
+        document.pop("members", None)
+        document.setdefault("words", [])
+        document.setdefault("memberCount", 0)
+        self.document = document
+        self.id: str = document["id"]
+        self.version: int = document.get("version", 0)
+        # Words saved before their format was checked are never picked
+        self.words = [word for word in (w.get("word", "").upper() for w in document["words"]) if valid_word_format(word)]
+        self.word_set = set(self.words)
+        self.size = ROOM_BASE_BYTES + ROOM_WORD_BYTES * len(document["words"])
+        self.expires_at = 0.0
+
+    @property
+    def host(self) -> Optional[str]:
+        return self.document.get("host")
+
+    def check_password(self, password: Optional[str]) -> bool:
+        if self.password_hash is None or not password:
+            return False
+        return hmac.compare_digest(hash_password(password), self.password_hash)
+
+    # Write-through helpers, mirroring the Mongo updates in the endpoints
+    def count_members(self, delta: int):
+        self.document["memberCount"] += delta
+
+    def set_host(self, username: str):
+        self.document["host"] = username
+
+    def add_words(self, words: List[Dict]):
+        for word in words:
+            if word["word"] not in self.word_set:
+                self.word_set.add(word["word"])
+                self.words.append(word["word"])
+                self.document["words"].append(word)
+                self.size += ROOM_WORD_BYTES
+
+    def remove_word(self, word: str):
+        if word in self.word_set:
+            self.word_set.discard(word)
+            self.words.remove(word)
+        words = [w for w in self.document["words"] if w.get("word") != word]
+        self.size -= ROOM_WORD_BYTES * (len(self.document["words"]) - len(words))
+        self.document["words"] = words
+
+class RoomCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, CachedRoom]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "writeThroughs": 0, "invalidations": 0, "evictions": 0}
+
+    async def get(self, room_id: str) -> Optional[CachedRoom]:
+        room = self.entries.get(room_id)
+        if room is not None and time.monotonic() < room.expires_at:
+            self.entries.move_to_end(room_id)
+            self.stats["hits"] += 1
+            return room
+        self.stats["misses"] += 1
+        
+        # Legacy rooms may still carry embedded message/score arrays; never load them
+        document = await db.rooms.find_one({"id": room_id}, {"messages": 0, "scores": 0})
+        if not document:
+            self.pop(room_id)
+            return None
+        return self.store(CachedRoom(document))
+
+    def store(self, room: CachedRoom) -> CachedRoom:
+        # A load that raced with a write-through must not roll the entry back
+        current = self.entries.get(room.id)
+        if current is not None and current.version > room.version:
+            return current
+        self.pop(room.id)
+        if room.size > self.max_bytes:
+            return room
+        room.expires_at = time.monotonic() + self.ttl
+        self.entries[room.id] = room
+        self.bytes += room.size
+        self._evict()
+        return room
+
+    def apply(self, room_id: str, version: int, change: Callable[[CachedRoom], None]):
+        room = self.entries.get(room_id)
+        if room is None:
+            return
+        if room.version != version - 1:
+            self.pop(room_id)
+            self.stats["invalidations"] += 1
+            return
+        size = room.size
+        change(room)
+        room.version = room.document["version"] = version
+        self.bytes += room.size - size
+        self.stats["writeThroughs"] += 1
+        self._evict()
+
+    def pop(self, room_id: str):
+        room = self.entries.pop(room_id, None)
+        if room is not None:
+            self.bytes -= room.size
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, room = self.entries.popitem(last=False)
+            self.bytes -= room.size
+            self.stats["evictions"] += 1
+
+room_cache = RoomCache(ROOM_CACHE_MAX_ENTRIES, ROOM_CACHE_MAX_BYTES, ROOM_CACHE_TTL)
+
+async def update_room(filter_query: Dict, update: Dict, change: Callable[[CachedRoom], None],
+                      projection: Optional[Dict] = None,
+                      return_document: ReturnDocument = ReturnDocument.BEFORE) -> Optional[Dict]:
+    # Conditional room write that bumps the version and is written through to
+    # the cache. Returns the projected document (as it was before the update
+    # unless asked otherwise), or None if the filter matched nothing.
+    room = await db.rooms.find_one_and_update(
+        filter_query,
+        {**update, "$inc": {**update.get("$inc", {}), "version": 1}},
+        projection={"_id": 0, "id": 1, "version": 1, **(projection or {})},
+        return_document=return_document
+    )
+    if room is not None:
+        version = room.get("version", 0) + (1 if return_document == ReturnDocument.BEFORE else 0)
+        room_cache.apply(filter_query["id"], version, change)
+    return room
+
+# Room membership
+# One document per (room, member) in room_members instead of an array on the
+# room document: joining is a single insert (the unique index turns a repeat
+# into a no-op), a membership check is an indexed point lookup, and members are
+# listed in join order a page at a time. Rooms keep a memberCount alongside.
+async def fetch_members(room_id: str, after: Optional[ObjectId] = None, limit: int = ROOM_MEMBER_PAGE_SIZE) -> List[Dict]:
+    query: Dict[str, Any] = {"roomId": room_id}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    
+    members = await db.room_members.find(query, {"roomId": 0}).sort("_id", 1).limit(limit).to_list(length=limit)
+    for member in members:
+        member["id"] = str(member.pop("_id"))
+    return members
+
+async def add_member(room_id: str, username: str, host: Optional[str] = None) -> bool:
+    # False if they already were a member. With `host`, only that user may add
+    # members, checked by the same conditional write that bumps the count
+    try:
+        await db.room_members.insert_one({"roomId": room_id, "username": username, "joinedAt": datetime.now()})
+    except DuplicateKeyError:
+        if host is not None:
+            # Nothing to write, but a non-host still mustn't get a success
+            await room_mutation_error(room_id, host, "manage members")
+        return False
+    
+    room_filter = {"id": room_id} if host is None else {"id": room_id, "host": host}
+    room = await update_room(room_filter, {"$inc": {"memberCount": 1}}, lambda cached: cached.count_members(1))
+    if room is None:
+        # The room was deleted meanwhile (or isn't theirs to manage)
+        await db.room_members.delete_one({"roomId": room_id, "username": username})
+        await member_mutation_error(room_id, host)
+    return True
+
+async def remove_member(room_id: str, username: str, projection: Optional[Dict] = None,
+                        host: Optional[str] = None) -> Optional[Dict]:
+    # The room after the removal (projected), or None if there is no such room.
+    # With `host`, only that user may remove members; on a miss the membership
+    # is put back as it was (same _id, so the join order is kept)
+    member = await db.room_members.find_one_and_delete({"roomId": room_id, "username": username})
+    removed = 1 if member else 0
+    room = await update_room(
+        {"id": room_id} if host is None else {"id": room_id, "host": host},
+        {"$inc": {"memberCount": -removed}},
+        lambda cached: cached.count_members(-removed),
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+    if room is None and host is not None:
+        if member:
+            try:
+                await db.room_members.insert_one(member)
+            except DuplicateKeyError:
+                # They rejoined meanwhile
+                pass
+        await member_mutation_error(room_id, host)
+    return room
+
+async def member_mutation_error(room_id: str, host: Optional[str]):
+    if host is not None:
+        await room_mutation_error(room_id, host, "manage members")
+        # Host and room both check out now, so the room changed under us
+        raise HTTPException(status_code=409, detail="The room changed, try again")
+    raise HTTPException(status_code=404, detail="Room not found")
 
-    async def broadcast(self, message: str, room_id: str):
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                await connection.send_text(message)
+async def migrate_embedded_members():
+    # One-off move of the members arrays rooms used to embed into room_members
+    if await db.migrations.find_one({"_id": "room_members"}):
+        return
+    
+    migrated = 0
+    async for room in db.rooms.find({"members": {"$exists": True}}, {"_id": 0, "id": 1, "members": 1, "createdAt": 1}):
+        members = list(dict.fromkeys(room.get("members") or []))
+        if members:
+            joined_at = room.get("createdAt") or datetime.now()
+            # In order, so join order (by _id) follows the old array order
+            await db.room_members.bulk_write([
+                UpdateOne({"roomId": room["id"], "username": username}, {"$setOnInsert": {"joinedAt": joined_at}}, upsert=True)
+                for username in members
+            ])
+        await db.rooms.update_one(
+            {"id": room["id"]},
+            {"$unset": {"members": ""}, "$set": {"memberCount": len(members)}, "$inc": {"version": 1}}
+        )
+        migrated += 1
+    
+    await db.migrations.update_one({"_id": "room_members"}, {"$set": {"completedAt": datetime.now()}}, upsert=True)
+    if migrated:
+        logger.info("Moved the members of %d rooms into room_members", migrated)
+
+# Room word selection
+# Words come from the room cache, where a random pick is O(1). No-repeat mode
+# deals every player their own shuffled deck and refills it once it runs out.
+class RoomWords:
+    def __init__(self, maxsize: int, deck_ttl: float):
+        # room id -> {username: remaining words}
+        self.decks = TTLCache(maxsize, deck_ttl)
+
+    async def pick(self, room_id: str, username: Optional[str] = None) -> str:
+        room = await room_cache.get(room_id)
+        if room is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        words, current = room.words, room.word_set
+        if not words:
+            raise HTTPException(status_code=404, detail="No words in this room")
+        if username is None:
+            return random.choice(words)
+        
+        # Stored again on every pick, so the decks of a room that is still
+        # playing never expire mid-session
+        decks = self.decks.get(room_id)
+        if decks is None:
+            decks = {}
+        self.decks.set(room_id, decks)
+        deck = decks.get(username)
+        # Skip words removed since the deck was dealt
+        while deck:
+            word = deck.pop()
+            if word in current:
+                return word
+        deck = list(words)
+        random.shuffle(deck)
+        decks[username] = deck
+        return deck.pop()
+
+    def drop(self, room_id: str):
+        self.decks.pop(room_id)
+
+room_words = RoomWords(ROOM_WORDS_CACHE_SIZE, ROOM_DECK_TTL)
+
+# Index provisioning
+# Every index a hot query relies on is declared here and reconciled at startup:
+# missing indexes are built, ones whose definition drifted are rebuilt.
+REQUIRED_INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        {"name": "username_unique", "keys": [("username", 1)], "unique": True},
+        {"name": "wordsSolved_desc", "keys": [("wordsSolved", -1)]},
+    ],
+    "rooms": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "isPrivate_createdAt", "keys": [("isPrivate", 1), ("createdAt", -1), ("id", -1)]},
+        {"name": "name_text", "keys": [("name", "text")]},
+    ],
+    "games": [
+        {"name": "roomId_username", "keys": [("roomId", 1), ("username", 1)]},
+    ],
+    "messages": [
+        {"name": "roomId_id", "keys": [("roomId", 1), ("_id", -1)]},
+    ],
+    "room_members": [
+        {"name": "roomId_username_unique", "keys": [("roomId", 1), ("username", 1)], "unique": True},
+        {"name": "roomId_id", "keys": [("roomId", 1), ("_id", 1)]},
+    ],
+    "game_sessions": [
+        {"name": "id_unique", "keys": [("id", 1)], "unique": True},
+        {"name": "createdAt_ttl", "keys": [("createdAt", 1)], "expireAfterSeconds": GAME_SESSION_TTL},
+    ],
+}
 
-manager = ConnectionManager()
+# Representative hot-path queries checked with explain() after provisioning
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"collection": "users", "filter": {"username": ""}},
+    {"collection": "users", "filter": {}, "sort": [("wordsSolved", -1)], "limit": 10},
+    {"collection": "rooms", "filter": {"id": ""}},
+    {"collection": "rooms", "filter": {"isPrivate": False}, "sort": [("createdAt", -1), ("id", -1)], "limit": ROOM_PAGE_SIZE},
+    {"collection": "games", "filter": {"roomId": ""}},
+    {"collection": "messages", "filter": {"roomId": ""}, "sort": [("_id", -1)], "limit": MESSAGE_PAGE_SIZE},
+    {"collection": "room_members", "filter": {"roomId": ""}, "sort": [("_id", 1)], "limit": ROOM_MEMBER_PAGE_SIZE},
+    {"collection": "game_sessions", "filter": {"id": ""}},
+]
+
+def _index_keys(key: List[tuple]) -> List[tuple]:
+    # The server may report directions as floats (1.0)
+    return [(field, int(direction) if isinstance(direction, float) else direction) for field, direction in key]
+
+def _index_matches(info: Dict, index: Dict) -> bool:
+    if bool(info.get("unique", False)) != index.get("unique", False):
+        return False
+    if info.get("expireAfterSeconds") != index.get("expireAfterSeconds"):
+        return False
+    text_fields = [field for field, direction in index["keys"] if direction == "text"]
+    if text_fields:
+        # Text indexes are reported as _fts/_ftsx keys plus per-field weights
+        return set(info.get("weights", {})) == set(text_fields)
+    return _index_keys(info["key"]) == index["keys"]
+
+async def ensure_indexes():
+    # Collections are independent, so they are checked concurrently
+    await asyncio.gather(*(ensure_collection_indexes(name, indexes) for name, indexes in REQUIRED_INDEXES.items()))
+
+async def ensure_collection_indexes(collection_name: str, indexes: List[Dict[str, Any]]):
+    collection = db[collection_name]
+    existing = await collection.index_information()
+    
+    for index in indexes:
+        # Already satisfied by an index with the same definition (under any name)?
+        if any(_index_matches(info, index) for info in existing.values()):
+            continue
+        
+        # Same name but a different definition: rebuild it
+        if index["name"] in existing:
+            logger.warning("Index %s.%s does not match its declaration; rebuilding", collection_name, index["name"])
+            await collection.drop_index(index["name"])
+        
+        logger.info("Building index %s.%s", collection_name, index["name"])
+        started = time.perf_counter()
+        try:
+            options = {key: value for key, value in index.items() if key not in ("name", "keys")}
+            await collection.create_index(index["keys"], name=index["name"], **options)
+        except Exception as e:
+            # e.g. duplicate keys blocking a unique index; keep serving
+            logger.error("Failed to build index %s.%s: %s", collection_name, index["name"], e)
+            continue
+        logger.info("Built index %s.%s in %.2fs", collection_name, index["name"], time.perf_counter() - started)
+
+def _plan_stages(plan: Dict) -> List[str]:
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+async def report_collection_scans():
+    await asyncio.gather(*(explain_hot_query(query) for query in HOT_QUERIES))
+
+async def explain_hot_query(query: Dict):
+    try:
+        cursor = db[query["collection"]].find(query["filter"])
+        if "sort" in query:
+            cursor = cursor.sort(query["sort"])
+        if "limit" in query:
+            cursor = cursor.limit(query["limit"])
+        explain = await cursor.explain()
+    except Exception as e:
+        logger.error("Could not explain %s query %s: %s", query["collection"], query["filter"], e)
+        return
+    
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    if "COLLSCAN" in _plan_stages(winning_plan):
+        logger.warning("Query on %s %s sort=%s uses COLLSCAN", query["collection"], query["filter"], query.get("sort"))
 
 @app.get("/api")
 async def root():
@@ -154,77 +1737,134 @@ async def login_user(user: User = Body(...)):
             # Create new user with initial stats
             new_user = UserInDB(username=user.username)
             await db.users.insert_one(new_user.dict())
-            logger.info(f"New user created: {user.username}")
+            leaderboard_cache.record(new_user.dict())
+            logger.info("New user created: %s", user.username)
             return {"success": True, "username": user.username, "id": new_user.id}
         
         return {"success": True, "username": user.username, "id": existing_user.get("id", str(existing_user.get("_id")))}
     
     except Exception as e:
-        logger.error(f"Error in login: {str(e)}")
+        logger.error("Error in login: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def record_score(username: str, won: bool, word: str, attempts: int, room_id: Optional[str]) -> Optional[Dict]:
+    # Update user stats
+    user = await db.users.find_one_and_update(
+        {"username": username},
+        {"$inc": {
+            "gamesPlayed": 1,
+            "wordsSolved": 1 if won else 0
+        }},
+        projection={"_id": 0, "username": 1, "wordsSolved": 1, "gamesPlayed": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if user:
+        leaderboard_cache.record(user)
+    
+    # Save the game result
+    game_result = {
+        "username": username,
+        "word": word,
+        "won": won,
+        "attempts": attempts,
+        "timestamp": datetime.now(),
+        "roomId": room_id
+    }
+    
+    if room_id:
+        # Patch the materialized leaderboard and push the delta. An expired
+        # (or never loaded) ranking is reloaded before the insert, so clients
+        # that only fetched it once on join keep getting deltas
+        async with room_leaderboard_lock(room_id):
+            leaderboard = await cached_room_leaderboard(room_id)
+            await db.games.insert_one(game_result)
+            delta = leaderboard.record(username, won, attempts)
+        await manager.broadcast(delta, room_id)
+    else:
+        await db.games.insert_one(game_result)
+    
+    return user
+
+async def record_session_score(session: Dict) -> bool:
+    # Flip the flag first so a session is scored exactly once
+    result = await db.game_sessions.update_one(
+        {"id": session["id"], "status": {"$ne": "playing"}, "scoreRecorded": False},
+        {"$set": {"scoreRecorded": True}}
+    )
+    if result.modified_count == 0:
+        return False
+    
+    user = await record_score(
+        session["username"],
+        session["status"] == "won",
+        session["word"],
+        len(session["guesses"]),
+        session.get("roomId")
+    )
+    if not user:
+        logger.warning("User not found for score update: %s", session["username"], extra={"room_id": session.get("roomId")})
+    return True
+
 @app.post("/api/scores")
-async def update_score(score: Score = Body(...)):
+async def update_score(request: Request, score: Score = Body(...)):
     try:
-        # Update user stats
-        result = await db.users.update_one(
-            {"username": score.username},
-            {"$inc": {
-                "gamesPlayed": 1,
-                "wordsSolved": 1 if score.won else 0
-            }}
-        )
+        enforce_rate_limit("scores", request, score.username)
         
-        # Save the game result
-        game_result = {
-            "username": score.username,
-            "word": score.word,
-            "won": score.won,
-            "attempts": score.attempts,
-            "timestamp": datetime.now(),
-            "roomId": score.roomId
-        }
+        # Results come from the verified session, never from the client
+        session = await db.game_sessions.find_one({"id": score.gameId}, {"_id": 0})
         
-        await db.games.insert_one(game_result)
+        if not session or session.get("username") != score.username:
+            raise HTTPException(status_code=404, detail="Game not found")
         
-        # If the game was in a room, update room stats
-        if score.roomId:
-            # Add score to room leaderboard
-            await db.rooms.update_one(
-                {"id": score.roomId},
-                {"$push": {"scores": game_result}}
-            )
+        if session.get("status") == "playing":
+            raise HTTPException(status_code=400, detail="Game is not finished")
         
-        if result.modified_count == 0:
-            logger.warning(f"User not found for score update: {score.username}")
-            raise HTTPException(status_code=404, detail="User not found")
+        # Finished games are normally scored by the final guess already
+        await record_session_score(session)
         
         return {"success": True}
     
+    except HTTPException as he:
+        raise he
     except Exception as e:
-        logger.error(f"Error updating score: {str(e)}")
+        logger.error("Error updating score: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/leaderboard")
-async def get_leaderboard():
+async def get_leaderboard(request: Request):
     try:
-        # Get top players by words solved
-        cursor = db.users.find().sort("wordsSolved", -1).limit(10)
-        leaderboard = await cursor.to_list(length=10)
-        
-        # Format the response
-        return [
-            {
-                "username": user["username"],
-                "wordsSolved": user["wordsSolved"],
-                "gamesPlayed": user["gamesPlayed"]
-            } for user in leaderboard
-        ]
+        leaderboard = leaderboard_cache.get()
+        
+        if leaderboard is None:
+            # Get top players by words solved
+            cursor = db.users.find({}, {"_id": 0, "username": 1, "wordsSolved": 1, "gamesPlayed": 1})
+            cursor = cursor.sort("wordsSolved", -1).limit(LEADERBOARD_SIZE)
+            users = await cursor.to_list(length=LEADERBOARD_SIZE)
+            
+            # Format the response
+            leaderboard_cache.store([
+                {
+                    "username": user["username"],
+                    "wordsSolved": user["wordsSolved"],
+                    "gamesPlayed": user["gamesPlayed"]
+                } for user in users
+            ])
+        
+        headers = {"ETag": leaderboard_cache.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request, leaderboard_cache.etag):
+            leaderboard_cache.stats["notModified"] += 1
+            return Response(status_code=304, headers=headers)
+        
+        return Response(leaderboard_cache.body, media_type="application/json", headers=headers)
     
     except Exception as e:
-        logger.error(f"Error fetching leaderboard: {str(e)}")
+        logger.error("Error fetching leaderboard: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/leaderboard/stats")
+async def get_leaderboard_stats():
+    return {**leaderboard_cache.stats, "cached": leaderboard_cache.entries is not None, "ttlSeconds": leaderboard_cache.ttl}
+
 # Room endpoints
 @app.post("/api/rooms")
 async def create_room(room_data: RoomCreate, user: User = Body(...)):
@@ -232,14 +1872,18 @@ async def create_room(room_data: RoomCreate, user: User = Body(...)):
         new_room = Room(
             name=room_data.name,
             host=user.username,
-            members=[user.username],
+            memberCount=1,
             isPrivate=room_data.isPrivate,
             password=room_data.password,
             description=room_data.description
         )
         
-        await db.rooms.insert_one(new_room.dict())
-        logger.info(f"New room created: {room_data.name} by {user.username}")
+        document = new_room.dict()
+        await db.rooms.insert_one(document)
+        await db.room_members.insert_one({"roomId": new_room.id, "username": user.username, "joinedAt": new_room.createdAt})
+        room_cache.store(CachedRoom(document))
+        room_list_cache.clear()
+        logger.info("New room created: %s by %s", room_data.name, user.username, extra={"room_id": new_room.id})
         
         return {
             "success": True,
@@ -249,243 +1893,460 @@ async def create_room(room_data: RoomCreate, user: User = Body(...)):
         }
     
     except Exception as e:
-        logger.error(f"Error creating room: {str(e)}")
+        logger.error("Error creating room: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/rooms")
-async def get_rooms(is_public: bool = Query(None)):
+async def get_rooms(
+    is_public: bool = Query(None),
+    q: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(ROOM_PAGE_SIZE, ge=1, le=100)
+):
     try:
-        # Filter for public rooms or all rooms
-        filter_query = {}
-        if is_public is not None:
-            filter_query["isPrivate"] = not is_public
-        
-        cursor = db.rooms.find(filter_query)
-        rooms = await cursor.to_list(length=100)
-        
-        # Format the response
-        return [
-            {
-                "id": room.get("id"),
-                "name": room.get("name"),
-                "host": room.get("host"),
-                "memberCount": len(room.get("members", [])),
-                "isPrivate": room.get("isPrivate", False),
-                "description": room.get("description"),
-                "wordCount": len(room.get("words", [])),
-                "createdAt": room.get("createdAt")
-            } for room in rooms
-        ]
+        cache_key = (is_public, q, cursor, limit)
+        cached = room_list_cache.get(cache_key)
+        if cached is None:
+            # Filter for public rooms or all rooms
+            filter_query: Dict[str, Any] = {}
+            if is_public is not None:
+                filter_query["isPrivate"] = not is_public
+            if q:
+                filter_query["$text"] = {"$search": q}
+            
+            # Keyset pagination on (createdAt, id), newest first
+            if cursor:
+                try:
+                    created_at, room_id = decode_room_cursor(cursor)
+                except Exception:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+                filter_query["$or"] = [
+                    {"createdAt": {"$lt": created_at}},
+                    {"createdAt": created_at, "id": {"$lt": room_id}}
+                ]
+            
+            rooms = await db.rooms.aggregate(room_list_pipeline(filter_query, limit)).to_list(length=limit)
+            next_cursor = encode_room_cursor(rooms[-1]) if len(rooms) == limit else None
+            # Cache the encoded page so hits skip serialization too
+            cached = (serialization.dumps(rooms), next_cursor)
+            room_list_cache.set(cache_key, cached)
+        
+        body, next_cursor = cached
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        
+        return Response(body, media_type="application/json", headers=headers)
     
+    except HTTPException as he:
+        raise he
     except Exception as e:
-        logger.error(f"Error fetching rooms: {str(e)}")
+        logger.error("Error fetching rooms: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/rooms/{room_id}")
-async def get_room(room_id: str):
+async def get_room(room_id: str, username: Optional[str] = Query(None)):
     try:
-        room = await db.rooms.find_one({"id": room_id})
+        # The cached document has no password or legacy message/score arrays
+        cached = await room_cache.get(room_id)
         
-        if not room:
+        if not cached:
             raise HTTPException(status_code=404, detail="Room not found")
         
-        # Don't expose password in response
-        if "password" in room:
-            del room["password"]
+        # Only the first page of members and the latest page of chat history;
+        # the rest via /members and /messages
+        members, messages = await asyncio.gather(fetch_members(room_id), fetch_messages(room_id))
+        room = {**cached.document, "members": [member["username"] for member in members], "messages": messages}
         
-        # Convert MongoDB document to JSON-serializable dictionary
-        room_dict = {}
-        for key, value in room.items():
-            if key == "_id":
-                room_dict["_id"] = str(value)
-            else:
-                room_dict[key] = value
+        # The words are the candidate answers: only the host gets to see them
+        room["wordCount"] = len(cached.words)
+        if username is None or username != cached.host:
+            del room["words"]
+        
+        # Encoded directly (ObjectId and datetimes included), no jsonable_encoder pass
+        return serialization.FastJSONResponse(room)
+    
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error("Error fetching room: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/rooms/{room_id}/messages")
+async def get_room_messages(
+    room_id: str,
+    before: Optional[str] = Query(None),
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=200)
+):
+    try:
+        if before is not None and not ObjectId.is_valid(before):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        if not await room_cache.get(room_id):
+            raise HTTPException(status_code=404, detail="Room not found")
+        
+        messages = await fetch_messages(room_id, ObjectId(before) if before else None, limit)
+        
+        # A full page means there may be older messages
+        next_before = messages[0]["id"] if len(messages) == limit else None
+        
+        return serialization.FastJSONResponse({"messages": messages, "nextBefore": next_before})
+    
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error("Error fetching messages: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/rooms/{room_id}/members")
+async def get_room_members(
+    room_id: str,
+    after: Optional[str] = Query(None),
+    limit: int = Query(ROOM_MEMBER_PAGE_SIZE, ge=1, le=1000)
+):
+    try:
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        room = await room_cache.get(room_id)
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
         
-        return room_dict
+        # In join order; a full page means there may be more
+        members = await fetch_members(room_id, ObjectId(after) if after else None, limit)
+        next_after = members[-1]["id"] if len(members) == limit else None
+        
+        return serialization.FastJSONResponse({"members": members, "nextAfter": next_after, "total": room.document["memberCount"]})
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error fetching room: {str(e)}")
+        logger.error("Error fetching members: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rooms/join")
 async def join_room(join_data: RoomJoin, user: User = Body(...)):
     try:
-        room = await db.rooms.find_one({"id": join_data.roomId})
-        
+        room = await room_cache.get(join_data.roomId)
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
         
-        # Check if room is private and requires password
-        if room.get("isPrivate", False):
-            if not join_data.password or join_data.password != room.get("password"):
-                raise HTTPException(status_code=403, detail="Invalid password")
+        # Private rooms only admit with the right password
+        if room.document.get("isPrivate") and not room.check_password(join_data.password):
+            raise HTTPException(status_code=403, detail="Invalid password")
         
-        # Check if user is already a member
-        if user.username in room.get("members", []):
+        if not await add_member(join_data.roomId, user.username):
             return {"success": True, "message": "Already a member"}
         
-        # Add user to members
-        await db.rooms.update_one(
-            {"id": join_data.roomId},
-            {"$push": {"members": user.username}}
-        )
-        
-        logger.info(f"User {user.username} joined room {join_data.roomId}")
+        logger.info("User %s joined room %s", user.username, join_data.roomId, extra={"room_id": join_data.roomId, "sampled": True})
         
         return {"success": True}
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error joining room: {str(e)}")
+        logger.error("Error joining room: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rooms/{room_id}/leave")
 async def leave_room(room_id: str, username: str = Body(...)):
     try:
-        room = await db.rooms.find_one({"id": room_id})
+        # Remove user from members, reading back the host
+        room = await remove_member(room_id, username, projection={"host": 1})
         
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
         
-        # Remove user from members
-        await db.rooms.update_one(
-            {"id": room_id},
-            {"$pull": {"members": username}}
-        )
-        
-        # If the user was the host, assign a new host or delete the room
+        # If the user was the host, hand over to the longest-standing member or delete the room
         if room.get("host") == username:
-            if len(room.get("members", [])) <= 1:
-                # Delete the room if no other members
-                await db.rooms.delete_one({"id": room_id})
-                return {"success": True, "message": "Room deleted"}
+            successor = await db.room_members.find_one({"roomId": room_id}, {"_id": 0, "username": 1}, sort=[("_id", 1)])
+            if successor is None:
+                # Delete the room if no other members (and nobody joined meanwhile)
+                result = await db.rooms.delete_one({"id": room_id, "host": username, "memberCount": {"$lte": 0}})
+                if result.deleted_count:
+                    # Including anyone whose join raced the deletion
+                    await db.room_members.delete_many({"roomId": room_id})
+                    drop_room_leaderboard(room_id)
+                    room_cache.pop(room_id)
+                    room_words.drop(room_id)
+                    room_list_cache.clear()
+                    return {"success": True, "message": "Room deleted"}
             else:
-                # Assign a new host
-                new_host = next((m for m in room.get("members", []) if m != username), None)
-                if new_host:
-                    await db.rooms.update_one(
-                        {"id": room_id},
-                        {"$set": {"host": new_host}}
-                    )
+                # Assign a new host, unless the room changed hands meanwhile
+                await update_room(
+                    {"id": room_id, "host": username},
+                    {"$set": {"host": successor["username"]}},
+                    lambda cached: cached.set_host(successor["username"])
+                )
         
-        logger.info(f"User {username} left room {room_id}")
+        logger.info("User %s left room %s", username, room_id, extra={"room_id": room_id, "sampled": True})
         
         return {"success": True}
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error leaving room: {str(e)}")
+        logger.error("Error leaving room: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def room_mutation_error(room_id: str, username: str, action: str):
+    # Explains why a conditional room update matched nothing (off the hot
+    # path), from a fresh copy since the cached one may be what misled us
+    room_cache.pop(room_id)
+    room = await room_cache.get(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    if room.host != username:
+        raise HTTPException(status_code=403, detail=f"Only the host can {action}")
+
 @app.post("/api/rooms/words")
-async def add_word(add_data: RoomAddWord, user: User = Body(...)):
+async def add_word(request: Request, add_data: RoomAddWord, user: User = Body(...)):
     try:
-        room = await db.rooms.find_one({"id": add_data.roomId})
-        
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
-        
-        # Only allow the host to add words
-        if room.get("host") != user.username:
-            raise HTTPException(status_code=403, detail="Only the host can add words")
+        enforce_rate_limit("words", request, user.username)
         
         # Validate word (no spaces, not too short)
         word = add_data.word.strip().upper()
-        if " " in word or len(word) < 3:
+        if not valid_word_format(word):
             raise HTTPException(status_code=400, detail="Invalid word format")
+        if not word_lists.is_valid(word):
+            raise HTTPException(status_code=400, detail="Not in the dictionary")
         
-        # Check if word already exists
-        existing_words = [w.get("word", "").upper() for w in room.get("words", [])]
-        if word in existing_words:
-            raise HTTPException(status_code=400, detail="Word already exists in this room")
-        
-        # Add the word
-        new_word = Word(word=word, addedBy=user.username)
-        await db.rooms.update_one(
-            {"id": add_data.roomId},
-            {"$push": {"words": new_word.dict()}}
+        # Add the word; only the host may, and only if it isn't there yet
+        new_word = Word(word=word, addedBy=user.username).dict()
+        room = await update_room(
+            {"id": add_data.roomId, "host": user.username, "words.word": {"$ne": word}},
+            {"$push": {"words": new_word}},
+            lambda cached: cached.add_words([new_word])
         )
         
-        logger.info(f"Word '{word}' added to room {add_data.roomId} by {user.username}")
+        if room is None:
+            await room_mutation_error(add_data.roomId, user.username, "add words")
+            raise HTTPException(status_code=400, detail="Word already exists in this room")
+        
+        logger.info("Word '%s' added to room %s by %s", word, add_data.roomId, user.username, extra={"room_id": add_data.roomId, "sampled": True})
         
         return {"success": True, "word": word}
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error adding word: {str(e)}")
+        logger.error("Error adding word: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/rooms/{room_id}/words/{word}")
-async def remove_word(room_id: str, word: str, user: User = Body(...)):
+def valid_word_format(word: str) -> bool:
+    # Letters A-Z only: anything else could never be typed in as a guess
+    return 3 <= len(word) <= MAX_WORD_LENGTH and word.isascii() and word.isalpha()
+
+async def read_lines(request: Request):
+    # Newline-delimited text from the raw body or a multipart upload's "file"
+    # field, decoded line by line as chunks arrive
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a 'file' upload")
+        
+        async def chunks():
+            while chunk := await upload.read(65536):
+                yield chunk
+        source = chunks()
+    else:
+        source = request.stream()
+    
+    pending = b""
+    async for chunk in source:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+def parse_import_line(line: str) -> str:
+    # Plain words, or NDJSON objects with a "word" field (the export format)
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            line = str(serialization.loads(line).get("word", ""))
+        except (ValueError, AttributeError):
+            return line.upper()
+    return line.strip().upper()
+
+@app.post("/api/rooms/{room_id}/words/import")
+async def import_words(room_id: str, request: Request, username: str = Query(...)):
     try:
-        room = await db.rooms.find_one({"id": room_id})
+        room = await db.rooms.find_one({"id": room_id}, {"_id": 0, "host": 1, "words.word": 1})
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
+        if room.get("host") != username:
+            raise HTTPException(status_code=403, detail="Only the host can add words")
         
+        # One pass: normalize, drop blanks and in-file duplicates, check format
+        results = []
+        seen = set()
+        candidates = []
+        async for line in read_lines(request):
+            word = parse_import_line(line)
+            if not word:
+                continue
+            if len(results) >= WORD_IMPORT_MAX_WORDS:
+                raise HTTPException(status_code=413, detail=f"At most {WORD_IMPORT_MAX_WORDS} words per import")
+            if word in seen:
+                results.append({"word": word, "status": "duplicate"})
+            elif not valid_word_format(word):
+                results.append({"word": word, "status": "invalid"})
+            else:
+                seen.add(word)
+                results.append({"word": word, "status": None})
+                candidates.append(word)
+        
+        # Charged per word, before the dictionary check and the write
+        enforce_rate_limit("word_imports", request, username, cost=len(results))
+        
+        for result, valid in zip([r for r in results if r["status"] is None], word_lists.validate_many(candidates)):
+            if not valid:
+                result["status"] = "not_in_dictionary"
+        
+        # A single conditional $push of every new word; if another write added
+        # one of them in between, re-read the room's words and try again
+        existing = {w.get("word") for w in room.get("words", [])}
+        for _ in range(WORD_IMPORT_RETRIES):
+            new_words = [r["word"] for r in results if r["status"] is None and r["word"] not in existing]
+            if not new_words:
+                break
+            now = datetime.now()
+            documents = [Word(word=word, addedBy=username, timestamp=now).dict() for word in new_words]
+            updated = await update_room(
+                {"id": room_id, "host": username, "words.word": {"$nin": new_words}},
+                {"$push": {"words": {"$each": documents}}},
+                lambda cached: cached.add_words(documents)
+            )
+            if updated is not None:
+                break
+            room = await db.rooms.find_one({"id": room_id}, {"_id": 0, "host": 1, "words.word": 1})
+            if not room:
+                room_cache.pop(room_id)
+                raise HTTPException(status_code=404, detail="Room not found")
+            if room.get("host") != username:
+                room_cache.pop(room_id)
+                raise HTTPException(status_code=403, detail="Only the host can add words")
+            existing = {w.get("word") for w in room.get("words", [])}
+        else:
+            raise HTTPException(status_code=409, detail="Room words changed during import, please retry")
+        
+        for result in results:
+            if result["status"] is None:
+                result["status"] = "exists" if result["word"] in existing else "added"
+        
+        counts: Dict[str, int] = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        
+        logger.info("Imported %d of %d words into room %s by %s", counts.get("added", 0), len(results), room_id, username, extra={"room_id": room_id})
+        
+        return {"success": True, "counts": counts, "results": results}
+    
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error("Error importing words: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/rooms/{room_id}/words/export")
+async def export_words(room_id: str, username: str = Query(...), format: str = Query("text", pattern="^(text|ndjson)$")):
+    try:
+        # The words are the candidate answers, so like import this is host only
+        room = await db.rooms.find_one({"id": room_id}, {"_id": 0, "host": 1})
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
+        if room.get("host") != username:
+            raise HTTPException(status_code=403, detail="Only the host can export words")
+        
+        # Unwound server-side and streamed in batches, so the room document is
+        # never held in memory as a whole
+        pipeline = [
+            {"$match": {"id": room_id}},
+            {"$unwind": "$words"},
+            {"$replaceRoot": {"newRoot": "$words"}}
+        ]
         
-        # Only allow the host to remove words
-        if room.get("host") != user.username:
-            raise HTTPException(status_code=403, detail="Only the host can remove words")
+        async def lines():
+            # Runs after the response has started, so a failure here can only
+            # be logged and the stream cut short
+            try:
+                batch = []
+                async for word in db.rooms.aggregate(pipeline, batchSize=WORD_EXPORT_BATCH_SIZE):
+                    if format == "ndjson":
+                        batch.append(serialization.dumps_text(word) + "\n")
+                    else:
+                        batch.append(f"{word.get('word', '')}\n")
+                    if len(batch) >= WORD_EXPORT_BATCH_SIZE:
+                        yield "".join(batch)
+                        batch = []
+                if batch:
+                    yield "".join(batch)
+            except Exception as e:
+                logger.error("Error exporting words: %s", e)
+                raise
         
-        # Remove the word
-        await db.rooms.update_one(
-            {"id": room_id},
-            {"$pull": {"words": {"word": word.upper()}}}
+        media_type = "application/x-ndjson" if format == "ndjson" else "text/plain"
+        return StreamingResponse(
+            lines(),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="words-{room_id}.{"ndjson" if format == "ndjson" else "txt"}"'}
         )
+    
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error("Error exporting words: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/rooms/{room_id}/words/{word}")
+async def remove_word(room_id: str, word: str, user: User = Body(...)):
+    try:
+        # Remove the word; only the host may
+        word = word.upper()
+        room = await update_room(
+            {"id": room_id, "host": user.username},
+            {"$pull": {"words": {"word": word}}},
+            lambda cached: cached.remove_word(word)
+        )
+        
+        if room is None:
+            await room_mutation_error(room_id, user.username, "remove words")
         
-        logger.info(f"Word '{word}' removed from room {room_id} by {user.username}")
+        logger.info("Word '%s' removed from room %s by %s", word, room_id, user.username, extra={"room_id": room_id, "sampled": True})
         
         return {"success": True}
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error removing word: {str(e)}")
+        logger.error("Error removing word: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rooms/members")
 async def update_member(update_data: RoomUpdateMembers, user: User = Body(...)):
     try:
-        room = await db.rooms.find_one({"id": update_data.roomId})
-        
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
-        
-        # Only allow the host to manage members
-        if room.get("host") != user.username:
-            raise HTTPException(status_code=403, detail="Only the host can manage members")
-        
         if update_data.action == "remove":
             # Prevent removing self (host)
             if update_data.username == user.username:
                 raise HTTPException(status_code=400, detail="Host cannot remove themselves")
             
-            # Remove the member
-            await db.rooms.update_one(
-                {"id": update_data.roomId},
-                {"$pull": {"members": update_data.username}}
-            )
+            # Remove the member; only the host may
+            await remove_member(update_data.roomId, update_data.username, host=user.username)
             
-            logger.info(f"User {update_data.username} removed from room {update_data.roomId}")
+            logger.info("User %s removed from room %s", update_data.username, update_data.roomId, extra={"room_id": update_data.roomId})
             
         elif update_data.action == "add":
             # Check if user exists
-            target_user = await db.users.find_one({"username": update_data.username})
+            target_user = await db.users.find_one({"username": update_data.username}, {"_id": 1})
             if not target_user:
                 raise HTTPException(status_code=404, detail="User not found")
             
-            # Add the member
-            await db.rooms.update_one(
-                {"id": update_data.roomId},
-                {"$addToSet": {"members": update_data.username}}
-            )
+            # Add the member; only the host may
+            await add_member(update_data.roomId, update_data.username, host=user.username)
             
-            logger.info(f"User {update_data.username} added to room {update_data.roomId}")
+            logger.info("User %s added to room %s", update_data.username, update_data.roomId, extra={"room_id": update_data.roomId})
             
         else:
             raise HTTPException(status_code=400, detail="Invalid action")
@@ -495,82 +2356,195 @@ async def update_member(update_data: RoomUpdateMembers, user: User = Body(...)):
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error managing members: {str(e)}")
+        logger.error("Error managing members: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/rooms/{room_id}/words")
-async def get_random_word(room_id: str):
+async def get_random_word(room_id: str, username: Optional[str] = None) -> str:
+    # Without a username any word; with one, the next from that player's deck
+    return await room_words.pick(room_id, username)
+
+# Game endpoints
+@app.post("/api/games")
+async def start_game(request: Request, game: GameStart = Body(...)):
     try:
-        room = await db.rooms.find_one({"id": room_id})
-        
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
+        enforce_rate_limit("games", request, game.username)
         
-        words = room.get("words", [])
-        if not words:
-            raise HTTPException(status_code=404, detail="No words in this room")
+        if game.roomId:
+            word = await get_random_word(game.roomId, game.username if game.noRepeat else None)
+        else:
+            word = word_lists.random_answer()
+            if not word:
+                raise HTTPException(status_code=503, detail="No word lists loaded")
         
-        # Get a random word
-        random_word = random.choice(words)
+        session = {
+            "id": str(uuid.uuid4()),
+            "username": game.username,
+            "roomId": game.roomId,
+            "word": word,
+            "guesses": [],
+            "status": "playing",
+            "scoreRecorded": False,
+            "createdAt": datetime.now()
+        }
+        await db.game_sessions.insert_one(session)
         
-        return {"word": random_word.get("word", "").upper()}
+        return serialization.FastJSONResponse({"gameId": session["id"], "wordLength": len(word), "maxAttempts": MAX_ATTEMPTS})
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error getting random word: {str(e)}")
+        logger.error("Error starting game: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/rooms/{room_id}/leaderboard")
-async def get_room_leaderboard(room_id: str):
+@app.post("/api/games/{game_id}/guess")
+async def submit_guess(game_id: str, request: Request, guess: Guess = Body(...)):
     try:
-        room = await db.rooms.find_one({"id": room_id})
+        # Guesses record scores, so they share the games bucket
+        enforce_rate_limit("games", request, guess.username)
         
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
+        session = await db.game_sessions.find_one({"id": game_id}, {"_id": 0})
         
-        scores = room.get("scores", [])
-        
-        # Group scores by user and calculate stats
-        user_stats = {}
-        for score in scores:
-            username = score.get("username")
-            if username not in user_stats:
-                user_stats[username] = {
-                    "username": username,
-                    "gamesPlayed": 0,
-                    "wordsSolved": 0,
-                    "avgAttempts": 0
-                }
-            
-            user_stats[username]["gamesPlayed"] += 1
-            if score.get("won", False):
-                user_stats[username]["wordsSolved"] += 1
-                user_stats[username]["avgAttempts"] += score.get("attempts", 6)
+        if not session or session.get("username") != guess.username:
+            raise HTTPException(status_code=404, detail="Game not found")
         
-        # Calculate average attempts
-        for username in user_stats:
-            if user_stats[username]["wordsSolved"] > 0:
-                user_stats[username]["avgAttempts"] /= user_stats[username]["wordsSolved"]
-            user_stats[username]["avgAttempts"] = round(user_stats[username]["avgAttempts"], 1)
+        if session["status"] != "playing":
+            raise HTTPException(status_code=400, detail="Game is already finished")
         
-        # Sort by words solved (desc) and avg attempts (asc)
-        leaderboard = sorted(
-            user_stats.values(),
-            key=lambda x: (-x["wordsSolved"], x["avgAttempts"])
+        word = session["word"]
+        attempt = guess.guess.strip().upper()
+        if len(attempt) != len(word) or not attempt.isascii() or not attempt.isalpha():
+            raise HTTPException(status_code=400, detail=f"Guess must be {len(word)} letters")
+        # The answer itself always counts, even a room word outside the dictionary.
+        # Lengths without a dictionary are not restricted
+        word_list = word_lists.get(len(word))
+        row = word_list.index_of(attempt) if word_list is not None else None
+        if attempt != word and word_list is not None and row is None:
+            raise HTTPException(status_code=400, detail="Not in word list")
+        
+        # The row found by the check above doubles as the matrix row
+        pattern = evaluate_guess(attempt, word, row)
+        attempts = len(session["guesses"]) + 1
+        if is_solved(pattern, len(word)):
+            status = "won"
+        elif attempts >= MAX_ATTEMPTS:
+            status = "lost"
+        else:
+            status = "playing"
+        
+        # Only applies if no other guess landed since we read the session
+        result = await db.game_sessions.update_one(
+            {"id": game_id, "status": "playing", "guesses": {"$size": attempts - 1}},
+            {"$push": {"guesses": attempt}, "$set": {"status": status}}
         )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=409, detail="Guess already submitted")
+        
+        response = {
+            "feedback": decode_feedback(pattern, len(word)),
+            "status": status,
+            "attempts": attempts
+        }
+        
+        if status != "playing":
+            session["guesses"].append(attempt)
+            session["status"] = status
+            await record_session_score(session)
+            response["word"] = word
+        
+        return serialization.FastJSONResponse(response)
+    
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error("Error submitting guess: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/rooms/{room_id}/leaderboard")
+async def get_room_leaderboard(room_id: str):
+    try:
+        if not await room_cache.get(room_id):
+            raise HTTPException(status_code=404, detail="Room not found")
+        
+        # Served from the materialized ranking; aggregated only on first load
+        leaderboard = await load_room_leaderboard(room_id)
         
-        return leaderboard
+        return serialization.FastJSONResponse(leaderboard.ranking())
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.error(f"Error getting room leaderboard: {str(e)}")
+        logger.error("Error getting room leaderboard: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/health/ready")
+async def readiness():
+    # For load balancers and orchestrators: ready while Mongo answers a ping
+    # within READINESS_TIMEOUT, which a saturated pool won't
+    pool = mongo_pool_metrics.stats()
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT)
+    except Exception as e:
+        logger.warning("Readiness check failed: %s %s", type(e).__name__, e)
+        return serialization.FastJSONResponse({"ready": False, "error": type(e).__name__, "pool": pool}, status_code=503)
+    return {"ready": True, "pool": pool}
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return Response(registry.render(), media_type=metrics.CONTENT_TYPE)
+
+def require_admin(request: Request):
+    token = request.headers.get("x-admin-token", "")
+    if not PROFILE_TOKEN or not hmac.compare_digest(token, PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request):
+    require_admin(request)
+    return [profile.summary() for profile in profiler.list()]
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request, format: str = Query("json", pattern="^(json|collapsed)$")):
+    require_admin(request)
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "collapsed":
+        return Response(
+            profile.collapsed(),
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.txt"'}
+        )
+    return profile.to_dict()
+
+@app.get("/api/broadcast/stats")
+async def get_broadcast_stats():
+    # Per-room WebSocket send latency and eviction counters, for rooms with
+    # sockets on this worker
+    room_ids = set(manager.active_connections)
+    return {room_id: manager.room_stats(room_id) for room_id in room_ids}
+
+@app.get("/api/dictionary/{word}")
+async def check_word(word: str):
+    word = word.strip().upper()
+    return {"word": word, "valid": word_lists.is_valid(word)}
+
+@app.post("/api/dictionary/validate")
+async def validate_words(check: WordCheck):
+    if len(check.words) > DICTIONARY_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {DICTIONARY_BATCH_LIMIT} words per request")
+    
+    words = [word.strip().upper() for word in check.words]
+    results = word_lists.validate_many(words)
+    return {
+        "results": [{"word": word, "valid": valid} for word, valid in zip(words, results)],
+        "invalid": [word for word, valid in zip(words, results) if not valid]
+    }
+
 # WebSocket for room chat
 @app.websocket("/api/ws/{room_id}")
 async def websocket_endpoint(websocket: WebSocket, room_id: str, username: str):
+    logs.room_id.set(room_id)
     await manager.connect(websocket, room_id)
     try:
         # Add join message to the room
@@ -580,38 +2554,59 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, username: str):
             "sender": "system",
             "timestamp": datetime.now().isoformat()
         }
-        await manager.broadcast(json.dumps(join_message), room_id)
+        await manager.broadcast(join_message, room_id)
         
         # Store the join message
-        await db.rooms.update_one(
-            {"id": room_id},
-            {"$push": {"messages": join_message}}
-        )
+        await store_message(room_id, join_message)
         
+        address = client_address(websocket)
+        throttled = False
         while True:
             data = await websocket.receive_text()
-            message_data = json.loads(data)
             
-            # Validate message
-            if not message_data.get("content"):
+            # Drop frames over the sender's or the room's rate before doing
+            # any work on them, and tell the sender once per throttled streak
+            if allow_client("chat", address, (room_id, username)) or not rate_limiters["room_chat"].allow(room_id):
+                if not throttled:
+                    throttled = True
+                    manager.send_to(websocket, room_id, {
+                        "type": "error",
+                        "content": "You are sending messages too fast",
+                        "sender": "system",
+                        "timestamp": datetime.now().isoformat()
+                    })
+                continue
+            throttled = False
+            
+            # Validate message; a frame too big to hold a valid one (even with
+            # every character escaped) isn't parsed at all
+            too_long = len(data) > 6 * MESSAGE_MAX_LENGTH + 1024
+            content = None if too_long else serialization.loads(data).get("content")
+            if too_long or (isinstance(content, str) and len(content) > MESSAGE_MAX_LENGTH):
+                manager.send_to(websocket, room_id, {
+                    "type": "error",
+                    "content": f"Messages are limited to {MESSAGE_MAX_LENGTH} characters",
+                    "sender": "system",
+                    "timestamp": datetime.now().isoformat()
+                })
+                continue
+            
+            if not content or not isinstance(content, str):
                 continue
             
             # Create message object
             message = {
                 "type": "chat",
-                "content": message_data.get("content"),
+                "content": content,
                 "sender": username,
                 "timestamp": datetime.now().isoformat()
             }
             
             # Broadcast to all connected clients in the room
-            await manager.broadcast(json.dumps(message), room_id)
+            await manager.broadcast(message, room_id)
             
             # Store the message
-            await db.rooms.update_one(
-                {"id": room_id},
-                {"$push": {"messages": message}}
-            )
+            await store_message(room_id, message)
     
     except WebSocketDisconnect:
         manager.disconnect(websocket, room_id)
@@ -623,21 +2618,16 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, username: str):
             "sender": "system",
             "timestamp": datetime.now().isoformat()
         }
-        await manager.broadcast(json.dumps(leave_message), room_id)
+        await manager.broadcast(leave_message, room_id)
         
         # Store the leave message
-        await db.rooms.update_one(
-            {"id": room_id},
-            {"$push": {"messages": leave_message}}
-        )
+        await store_message(room_id, leave_message)
     
     except Exception as e:
-        logger.error(f"WebSocket error: {str(e)}")
+        logger.error("WebSocket error: %s", e)
         manager.disconnect(websocket, room_id)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
-
 if __name__ == "__main__":
+    # Only needed when run directly; the uvicorn CLI has it loaded already
+    import uvicorn
     uvicorn.run("server:app", host="0.0.0.0", port=8001, reload=True)
@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Dictionaries are plain text, one word per line, split by word length:
+#   answers_<n>.txt  words a game may pick as the target
+#   allowed_<n>.txt  words accepted as guesses (answers are always allowed)
+#
+# A length is only restricted once it has an allowed list: answers on their own
+# would make them the only valid guesses, so they are skipped until one exists.
+#
+# For every length a guess x answer feedback matrix is precomputed once and
+# saved as .npy next to a hash of its inputs, then memory-mapped on later
+# startups. Entries use the same packing as server.score_guess: base 3, little
+# endian, one digit per letter (0 absent, 1 present, 2 correct). Five letters
+# fit in uint8 (3^5 = 243); longer words need uint16.
+#
+# The allowed words double as the dictionary index: each length is one sorted
+# fixed-width byte array, and a word's position in it is its matrix row. Single
+# lookups binary search only the words sharing the first two letters (676
+# bucket offsets; an empty bucket rejects without searching), batches are one
+# vectorized searchsorted.
+
+BUILD_BLOCK_ROWS = 1024
+
+
+def _read_words(path: Path) -> List[str]:
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [line.strip().upper() for line in f if line.strip()]
+
+
+def _encode(words: List[str], length: int) -> np.ndarray:
+    # Letters as 0..25 codes, one row per word
+    if not words:
+        return np.zeros((0, length), dtype=np.uint8)
+    return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), length) - ord("A")
+
+
+def pattern_dtype(length: int):
+    return np.uint8 if 3 ** length <= 256 else np.uint16
+
+
+def build_feedback_matrix(guesses: np.ndarray, answers: np.ndarray) -> np.ndarray:
+    # Vectorized two-pass Wordle scoring over every (guess, answer) pair,
+    # processed in blocks of guesses to bound the temporary letter counts
+    rows, length = guesses.shape
+    columns = answers.shape[0]
+    matrix = np.zeros((rows, columns), dtype=pattern_dtype(length))
+    answer_index = np.arange(columns)
+
+    for start in range(0, rows, BUILD_BLOCK_ROWS):
+        block = guesses[start:start + BUILD_BLOCK_ROWS]
+        size = block.shape[0]
+        block_index = np.arange(size)[:, None]
+        green = block[:, None, :] == answers[None, :, :]
+
+        # Answer letters not matched in place are available for yellows
+        counts = np.zeros((size, columns, 26), dtype=np.int16)
+        for j in range(length):
+            counts[:, answer_index, answers[:, j]] += ~green[:, :, j]
+
+        pattern = np.zeros((size, columns), dtype=np.int32)
+        for i in range(length):
+            letter = np.broadcast_to(block[:, i][:, None], (size, columns))
+            present = ~green[:, :, i] & (counts[block_index, answer_index, letter] > 0)
+            counts[block_index, answer_index, letter] -= present
+            pattern += (green[:, :, i] * 2 + present) * 3 ** i
+
+        matrix[start:start + size] = pattern
+
+    return matrix
+
+
+class WordList:
+    def __init__(self, length: int, answers: List[str], allowed: List[str]):
+        self.length = length
+        self.answers = answers
+        self.answer_index: Dict[str, int] = {word: i for i, word in enumerate(answers)}
+        self.blob = np.array(sorted(allowed), dtype=f"S{length}").tobytes()
+        self.words = np.frombuffer(self.blob, dtype=f"S{length}")
+        # buckets[p]:buckets[p + 1] is the range of words starting with prefix p
+        codes = self.words.view(np.uint8).reshape(len(self.words), length).astype(np.intp) - ord("A")
+        prefixes = codes[:, 0] * 26 + codes[:, 1] if length > 1 else codes[:, 0] * 26
+        self.buckets: List[int] = np.searchsorted(prefixes, np.arange(26 * 26 + 1)).tolist()
+        self.matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return self.index_of(word) is not None
+
+    def index_of(self, word: str) -> Optional[int]:
+        if len(word) != self.length or not word.isascii() or not word.isalpha() or not word.isupper():
+            return None
+        key = word.encode()
+        length = self.length
+        prefix = (key[0] - 65) * 26 + (key[1] - 65 if length > 1 else 0)
+        low, high = self.buckets[prefix], self.buckets[prefix + 1]
+        blob = self.blob
+        while low < high:
+            middle = (low + high) // 2
+            start = middle * length
+            candidate = blob[start:start + length]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def contains_many(self, words: List[str]) -> np.ndarray:
+        # One vectorized search for the whole batch
+        if not words or not len(self.words):
+            return np.zeros(len(words), dtype=bool)
+        keys = np.array([word.encode() for word in words], dtype=f"S{self.length}")
+        positions = np.minimum(np.searchsorted(self.words, keys), len(self.words) - 1)
+        return self.words[positions] == keys
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha1(self.words.tobytes())
+        digest.update(b"--\n")
+        for word in self.answers:
+            digest.update(word.encode() + b"\n")
+        return digest.hexdigest()[:16]
+
+    def load_matrix(self, cache_dir: Path):
+        path = cache_dir / f"feedback_{self.length}_{self.fingerprint()}.npy"
+        if path.exists():
+            self.matrix = np.load(path, mmap_mode="r")
+            return
+
+        started = time.perf_counter()
+        guesses = self.words.view(np.uint8).reshape(len(self.words), self.length) - ord("A")
+        matrix = build_feedback_matrix(guesses, _encode(self.answers, self.length))
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent workers never map a partial file
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, path)
+        self.matrix = np.load(path, mmap_mode="r")
+        logger.info("Built %d-letter feedback matrix %s in %.2fs", self.length, matrix.shape, time.perf_counter() - started)
+
+    def feedback(self, guess: str, answer: str) -> Optional[int]:
+        # Lookup when both words are in this list, else None. Finding the
+        # guess's row is a binary search; callers that already have it (from
+        # checking the guess is a word) use feedback_at
+        column = self.answer_index.get(answer)
+        row = self.index_of(guess) if column is not None else None
+        return self.feedback_at(row, answer)
+
+    def feedback_at(self, row: Optional[int], answer: str) -> Optional[int]:
+        # O(1): the pattern for the guess at index_of() == row
+        if self.matrix is None or row is None:
+            return None
+        column = self.answer_index.get(answer)
+        if column is None:
+            return None
+        return self.matrix.item(row, column)
+
+    def remaining_answers(self, history: List[tuple]) -> List[str]:
+        # Answers still consistent with [(guess, pattern), ...], e.g. for hints
+        mask = np.ones(len(self.answers), dtype=bool)
+        for guess, pattern in history:
+            row = self.index_of(guess)
+            if row is None or self.matrix is None:
+                continue
+            mask &= self.matrix[row] == pattern
+        return [self.answers[i] for i in np.flatnonzero(mask)]
+
+
+class WordLists:
+    def __init__(self, directory: Path, cache_dir: Path):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.lists: Dict[int, WordList] = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def ensure_loaded(self):
+        # Normally done in the background at startup; first use waits for it
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self.load()
+
+    def load(self):
+        started = time.perf_counter()
+        lengths = set()
+        for path in self.directory.glob("allowed_*.txt"):
+            suffix = path.stem.rsplit("_", 1)[1]
+            if suffix.isdigit():
+                lengths.add(int(suffix))
+        for path in self.directory.glob("answers_*.txt"):
+            suffix = path.stem.rsplit("_", 1)[1]
+            if suffix.isdigit() and int(suffix) not in lengths:
+                logger.warning("Skipping %s: there is no allowed_%s.txt to validate guesses against", path.name, suffix)
+
+        lists = {}
+        for length in sorted(lengths):
+            answers = _read_words(self.directory / f"answers_{length}.txt")
+            allowed = _read_words(self.directory / f"allowed_{length}.txt")
+            # Answers are always valid guesses
+            allowed = sorted(set(allowed) | set(answers))
+            word_list = WordList(length, answers, allowed)
+            if answers:
+                word_list.load_matrix(self.cache_dir)
+            lists[length] = word_list
+
+        self.lists = lists
+        self.loaded = True
+        logger.info("Loaded word lists for lengths %s in %.1fms", sorted(lists), (time.perf_counter() - started) * 1000)
+
+    def get(self, length: int) -> Optional[WordList]:
+        self.ensure_loaded()
+        return self.lists.get(length)
+
+    def is_valid(self, word: str) -> bool:
+        # Lengths without a dictionary are not restricted
+        word_list = self.get(len(word))
+        return word_list is None or word in word_list
+
+    def validate_many(self, words: List[str]) -> List[bool]:
+        # Bulk check, batched per word length
+        self.ensure_loaded()
+        results = [True] * len(words)
+        by_length: Dict[int, List[int]] = {}
+        for i, word in enumerate(words):
+            by_length.setdefault(len(word), []).append(i)
+        for length, indexes in by_length.items():
+            word_list = self.lists.get(length)
+            if word_list is None:
+                continue
+            candidates = [words[i] for i in indexes]
+            wellformed = [word.isascii() and word.isalpha() and word.isupper() for word in candidates]
+            found = word_list.contains_many([word if ok else "A" * length for word, ok in zip(candidates, wellformed)])
+            for i, ok, hit in zip(indexes, wellformed, found):
+                results[i] = bool(ok and hit)
+        return results
+
+    def random_answer(self, length: Optional[int] = None) -> Optional[str]:
+        # Uniform over all answers, so a length with few answers isn't picked
+        # as often as one with many
+        self.ensure_loaded()
+        candidates = [word_list for word_list in self.lists.values() if word_list.answers]
+        if length is not None:
+            candidates = [word_list for word_list in candidates if word_list.length == length]
+        if not candidates:
+            return None
+        word_list = random.choices(candidates, weights=[len(word_list.answers) for word_list in candidates])[0]
+        return random.choice(word_list.answers)
+
+    def feedback(self, guess: str, answer: str) -> Optional[int]:
+        word_list = self.get(len(answer))
+        return word_list.feedback(guess, answer) if word_list else None
@@ -2,20 +2,8 @@ import { useState, useEffect, useRef } from "react";
 import "./App.css";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const MIN_WORD_LENGTH = 3;
-const MAX_WORD_LENGTH = 8;
 const MAX_ATTEMPTS = 6;
 
-// Sample word list (fallback if no custom words are available)
-const wordList = {
-  3: ["cat", "dog", "run", "sun", "big", "one", "two", "red", "joy", "box"],
-  4: ["word", "play", "love", "time", "game", "book", "code", "blue", "home", "jump"],
-  5: ["world", "pizza", "house", "music", "water", "dance", "space", "dream", "peace", "happy"],
-  6: ["player", "garden", "studio", "wonder", "coffee", "sunset", "future", "memory", "coding", "planet"],
-  7: ["amazing", "dancing", "journey", "playing", "freedom", "gravity", "magical", "rainbow", "society", "destiny"],
-  8: ["computer", "learning", "business", "creative", "friendly", "movement", "sunshine", "thinking", "beautiful", "developer"]
-};
-
 function App() {
   // User and Auth State
   const [username, setUsername] = useState("");
@@ -26,7 +14,9 @@ function App() {
   
   // Game State
   const [gameState, setGameState] = useState("waiting"); // waiting, playing, won, lost
-  const [targetWord, setTargetWord] = useState("");
+  const [gameId, setGameId] = useState(null);
+  const [wordLength, setWordLength] = useState(0);
+  const [targetWord, setTargetWord] = useState(""); // revealed by the server when the game ends
   const [currentAttempt, setCurrentAttempt] = useState(0);
   const [boardData, setBoardData] = useState([]);
   const [currentRowData, setCurrentRowData] = useState([]);
@@ -46,6 +36,7 @@ function App() {
   const [rooms, setRooms] = useState([]);
   const [currentRoom, setCurrentRoom] = useState(null);
   const [roomMessages, setRoomMessages] = useState([]);
+  const [roomLeaderboard, setRoomLeaderboard] = useState([]);
   const [messageInput, setMessageInput] = useState("");
   const [showPrivateRooms, setShowPrivateRooms] = useState(false);
   const [roomPassword, setRoomPassword] = useState("");
@@ -89,19 +80,19 @@ function App() {
 
   // Initialize game board
   useEffect(() => {
-    if (gameState === "playing" && targetWord) {
+    if (gameState === "playing" && gameId) {
       // Initialize board data and current row
       const newBoardData = Array(MAX_ATTEMPTS).fill().map(() => 
-        Array(targetWord.length).fill().map(() => ({ letter: "", status: "empty" }))
+        Array(wordLength).fill().map(() => ({ letter: "", status: "empty" }))
       );
       
       setBoardData(newBoardData);
-      setCurrentRowData(Array(targetWord.length).fill().map(() => ({ letter: "", status: "empty" })));
+      setCurrentRowData(Array(wordLength).fill().map(() => ({ letter: "", status: "empty" })));
       setCurrentAttempt(0);
       setLetterStatus({});
-      gridRefs.current = Array(MAX_ATTEMPTS).fill().map(() => Array(targetWord.length).fill(null));
+      gridRefs.current = Array(MAX_ATTEMPTS).fill().map(() => Array(wordLength).fill(null));
     }
-  }, [gameState, targetWord]);
+  }, [gameState, gameId]);
 
   // Save current attempt to board when currentRowData changes
   useEffect(() => {
@@ -128,6 +119,17 @@ function App() {
     
     newSocket.onmessage = (event) => {
       const message = JSON.parse(event.data);
+      
+      // Leaderboard deltas move a single entry to its new rank
+      if (message.type === "leaderboard") {
+        setRoomLeaderboard(prev => {
+          const next = prev.filter(entry => entry.username !== message.entry.username);
+          next.splice(message.rank - 1, 0, message.entry);
+          return next;
+        });
+        return;
+      }
+      
       setRoomMessages(prev => [...prev, message]);
     };
     
@@ -298,6 +300,7 @@ function App() {
       
       if (response.ok) {
         await fetchRoomDetails(roomId);
+        setRoomLeaderboard(await fetchRoomLeaderboard(roomId));
         setCurrentView("room");
         connectToRoom(roomId);
       } else {
@@ -313,7 +316,8 @@ function App() {
   // Fetch room details
   const fetchRoomDetails = async (roomId) => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/rooms/${roomId}`);
+      // The room's words are only included for its host
+      const response = await fetch(`${BACKEND_URL}/api/rooms/${roomId}?username=${encodeURIComponent(username)}`);
       if (response.ok) {
         const roomData = await response.json();
         setCurrentRoom(roomData);
@@ -351,6 +355,7 @@ function App() {
       
       setCurrentRoom(null);
       setRoomMessages([]);
+      setRoomLeaderboard([]);
       setCurrentView("rooms");
       fetchRooms();
       
@@ -445,62 +450,50 @@ function App() {
     }
   };
 
+  // Start a game session; the server keeps the target word
+  const beginGame = async (roomId) => {
+    const response = await fetch(`${BACKEND_URL}/api/games`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      // Room games deal each player every room word once before repeating
+      body: JSON.stringify({ username, roomId, noRepeat: Boolean(roomId) }),
+    });
+    if (!response.ok) {
+      throw new Error("Failed to start a game");
+    }
+    
+    const data = await response.json();
+    setTargetWord("");
+    setWordLength(data.wordLength);
+    setGameId(data.gameId);
+    setGameState("playing");
+    setCurrentView("game");
+  };
+
   // Start a game with a random word from the room
   const startGame = async () => {
     if (!currentRoom) return;
     
     try {
       // Check if room has words
-      if (!currentRoom.words || currentRoom.words.length === 0) {
+      if (!(currentRoom.wordCount ?? currentRoom.words?.length)) {
         alert("This room has no words yet. Add some words first!");
         return;
       }
       
-      // Get a random word from the room
-      const response = await fetch(`${BACKEND_URL}/api/rooms/${currentRoom.id}/words`);
-      if (response.ok) {
-        const data = await response.json();
-        setTargetWord(data.word);
-        setGameState("playing");
-        setCurrentView("game");
-      } else {
-        throw new Error("Failed to get a word");
-      }
+      await beginGame(currentRoom.id);
     } catch (error) {
       console.error("Error starting game:", error);
       
-      // Fallback to sample word list
-      const wordLength = Math.floor(Math.random() * (MAX_WORD_LENGTH - MIN_WORD_LENGTH + 1)) + MIN_WORD_LENGTH;
-      const randomIndex = Math.floor(Math.random() * wordList[wordLength].length);
-      const newTargetWord = wordList[wordLength][randomIndex].toUpperCase();
-      setTargetWord(newTargetWord);
-      setGameState("playing");
-      setCurrentView("game");
-    }
-  };
-
-  // Update leaderboard with new score
-  const updateLeaderboard = async (won) => {
-    try {
-      const response = await fetch(`${BACKEND_URL}/api/scores`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({ 
-          username, 
-          won, 
-          word: targetWord,
-          attempts: currentAttempt + 1,
-          roomId: currentRoom ? currentRoom.id : null
-        }),
-      });
-      
-      if (!response.ok) {
-        console.error("Error updating score");
+      // Fallback to the server's sample word list
+      try {
+        await beginGame(null);
+      } catch (fallbackError) {
+        console.error("Error starting fallback game:", fallbackError);
+        alert("Error starting game. Please try again.");
       }
-    } catch (error) {
-      console.error("Error updating score:", error);
     }
   };
 
@@ -578,14 +571,14 @@ function App() {
       setCurrentRowData(newRow);
       
       // Auto-advance to next cell
-      if (cellIndex < targetWord.length - 1 && gridRefs.current[rowIndex][cellIndex + 1]) {
+      if (cellIndex < wordLength - 1 && gridRefs.current[rowIndex][cellIndex + 1]) {
         gridRefs.current[rowIndex][cellIndex + 1].focus();
       }
     }
   };
 
   // Check the current word
-  const checkWord = () => {
+  const checkWord = async () => {
     // Check if all cells in the current row are filled
     const isRowComplete = currentRowData.every(cell => cell.letter !== "");
     if (!isRowComplete) {
@@ -593,37 +586,30 @@ function App() {
       return;
     }
 
-    // Check if the word matches the target
     const currentWord = currentRowData.map(cell => cell.letter).join("");
     
-    // Evaluate each letter
-    const newRowData = [...currentRowData];
-    const letterCount = {};
-    
-    // Count letters in target word
-    for (const letter of targetWord) {
-      letterCount[letter] = (letterCount[letter] || 0) + 1;
-    }
-    
-    // First, mark correct positions (green)
-    for (let i = 0; i < targetWord.length; i++) {
-      if (newRowData[i].letter === targetWord[i]) {
-        newRowData[i].status = "correct";
-        letterCount[newRowData[i].letter]--;
+    // The server evaluates each letter
+    let result;
+    try {
+      const response = await fetch(`${BACKEND_URL}/api/games/${gameId}/guess`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({ username, guess: currentWord }),
+      });
+      result = await response.json();
+      if (!response.ok) {
+        alert(result.detail || "Error checking word");
+        return;
       }
+    } catch (error) {
+      console.error("Error checking word:", error);
+      alert("Error checking word. Please try again.");
+      return;
     }
     
-    // Then mark present letters in wrong positions (yellow)
-    for (let i = 0; i < targetWord.length; i++) {
-      if (newRowData[i].status !== "correct") {
-        if (targetWord.includes(newRowData[i].letter) && letterCount[newRowData[i].letter] > 0) {
-          newRowData[i].status = "present";
-          letterCount[newRowData[i].letter]--;
-        } else {
-          newRowData[i].status = "absent";
-        }
-      }
-    }
+    const newRowData = currentRowData.map((cell, i) => ({ ...cell, status: result.feedback[i] }));
     
     // Update keyboard letter status
     const newLetterStatus = { ...letterStatus };
@@ -643,11 +629,11 @@ function App() {
     setBoardData(newBoardData);
     
     // Animate the reveal
-    revealRow(currentAttempt);
+    revealRow(currentAttempt, result);
   };
 
   // Animate row reveal
-  const revealRow = async (rowIndex) => {
+  const revealRow = async (rowIndex, result) => {
     const row = document.querySelectorAll(`.row-${rowIndex} .cell`);
     
     // Sequentially flip each cell
@@ -661,16 +647,15 @@ function App() {
     
     // After all animations complete, check game state
     setTimeout(() => {
-      checkGameState();
+      checkGameState(result);
     }, 500);
   };
 
-  // Check if game is won or lost
-  const checkGameState = () => {
-    const currentWord = boardData[currentAttempt].map(cell => cell.letter).join("");
-    
-    if (currentWord === targetWord) {
+  // Check if game is won or lost (scores are recorded by the server)
+  const checkGameState = (result) => {
+    if (result.status === "won") {
       // Game won
+      setTargetWord(result.word);
       setGameState("won");
       
       // Update stats
@@ -682,10 +667,10 @@ function App() {
         maxStreak: Math.max(gameStats.maxStreak, gameStats.currentStreak + 1)
       };
       saveUserStats(newStats);
-      updateLeaderboard(true);
       
-    } else if (currentAttempt >= MAX_ATTEMPTS - 1) {
+    } else if (result.status === "lost") {
       // Game lost (used all attempts)
+      setTargetWord(result.word);
       setGameState("lost");
       
       // Update stats
@@ -695,12 +680,11 @@ function App() {
         currentStreak: 0
       };
       saveUserStats(newStats);
-      updateLeaderboard(false);
       
     } else {
       // Continue to next attempt
       setCurrentAttempt(currentAttempt + 1);
-      setCurrentRowData(Array(targetWord.length).fill().map(() => ({ letter: "", status: "empty" })));
+      setCurrentRowData(Array(wordLength).fill().map(() => ({ letter: "", status: "empty" })));
     }
   };
 
@@ -711,7 +695,7 @@ function App() {
     
     // Create emoji grid
     for (let i = 0; i <= currentAttempt; i++) {
-      for (let j = 0; j < targetWord.length; j++) {
+      for (let j = 0; j < wordLength; j++) {
         if (boardData[i][j].status === "correct") {
           result += "🟩";
         } else if (boardData[i][j].status === "present") {
@@ -745,6 +729,7 @@ function App() {
     setCurrentView("login");
     setCurrentRoom(null);
     setRoomMessages([]);
+    setRoomLeaderboard([]);
     
     // Close WebSocket
     if (socket) {
@@ -806,7 +791,7 @@ function App() {
         <div className="room-content">
           <div className="room-sidebar">
             <div className="section-header">
-              <h3>Members ({currentRoom.members?.length || 0})</h3>
+              <h3>Members ({currentRoom.memberCount ?? currentRoom.members?.length ?? 0})</h3>
             </div>
             <div className="members-list">
               {currentRoom.members?.map(member => (
@@ -827,6 +812,28 @@ function App() {
               ))}
             </div>
             
+            <div className="section-header">
+              <h3>Room Leaderboard</h3>
+            </div>
+            <div className="members-list">
+              {roomLeaderboard.length === 0 && (
+                <div className="member-item">
+                  <span className="member-name">No games played yet</span>
+                </div>
+              )}
+              {roomLeaderboard.map((entry, index) => (
+                <div key={entry.username} className="member-item">
+                  <span className="member-name">
+                    {index + 1}. {entry.username}
+                    {entry.username === username && " (You)"}
+                  </span>
+                  <span className="member-stats">
+                    {entry.wordsSolved}/{entry.gamesPlayed} solved, avg {entry.avgAttempts}
+                  </span>
+                </div>
+              ))}
+            </div>
+            
             <div className="room-actions">
               <button className="primary-button" onClick={startGame}>
                 Play Game
@@ -846,9 +853,9 @@ function App() {
                 {roomMessages.map((msg, index) => (
                   <div 
                     key={index} 
-                    className={`message ${msg.sender === username ? 'own-message' : ''} ${msg.type === 'system' ? 'system-message' : ''}`}
+                    className={`message ${msg.sender === username ? 'own-message' : ''} ${msg.type === 'system' || msg.type === 'error' ? 'system-message' : ''}`}
                   >
-                    {msg.type !== 'system' && <span className="message-sender">{msg.sender}</span>}
+                    {msg.type !== 'system' && msg.type !== 'error' && <span className="message-sender">{msg.sender}</span>}
                     <span className="message-content">{msg.content}</span>
                     <span className="message-time">
                       {new Date(msg.timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}
@@ -1161,7 +1168,7 @@ function App() {
           {gameState === "playing" && renderKeyboard()}
           
           <div className="game-info">
-            <p>Guess the {targetWord.length}-letter WORD in {MAX_ATTEMPTS} tries</p>
+            <p>Guess the {wordLength}-letter WORD in {MAX_ATTEMPTS} tries</p>
             <p>
               <span className="color-box correct"></span> Correct letter, correct position
             </p>